@@ -1,18 +1,25 @@
 import asyncio
+import json
 import os
 import logging
 
-from bs4 import BeautifulSoup
+import numpy as np
+import pandas as pd
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from starlette.staticfiles import StaticFiles
-import pandas as pd
 from fastapi.responses import JSONResponse
 
-from parser import extract_content
-from data_processing import convert_data_to_files
-from utils import load_config, blacklist, add_unreachable_site, get_google_search_results
+from parser import extract_content, extraction_cache, selenium_executor, start_process_pool, stop_process_pool
+from fetcher import http_fetcher
+from browser_pool import browser_pool
+from scheduler import BatchScheduler, get_domain
+from job_store import JobStore, serialize_row
+from job_queue import JobQueue
+from data_processing import clean_table, iter_csv, iter_xlsx, iter_xml_zip
+from blacklist_index import BlacklistIndex, SiteLog, SiteLogWriter
+from utils import load_config, get_google_search_results
 
 # Налаштування статичних файлів
 static_dir = 'templates'
@@ -30,8 +37,52 @@ logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
 # Завантаження конфігурації
 config = load_config('config.yaml')
 
-# Глобальна змінна для зберігання результатів парсингу
-parsed_data = pd.DataFrame()
+# Сховище результатів парсингу (окремо для кожної задачі)
+job_store = JobStore()
+
+# Планувальник пакетної обробки URL (спільний для всіх запитів)
+scheduler = BatchScheduler()
+
+# Індекси списків сайтів у пам'яті (файли перечитуються лише після зміни)
+blacklist_index = BlacklistIndex('blacklist.txt')
+page_log = SiteLog('Blacklist_Page.txt')
+domain_log = SiteLog('Blacklist_Domen.txt')
+site_log_writer = SiteLogWriter([page_log, domain_log])
+
+def refresh_blacklists():
+    """
+    Підхоплює зміни у файлах списків сайтів. Викликається один раз на запит, а не для кожного URL.
+    """
+    blacklist_index.refresh()
+    page_log.refresh()
+    domain_log.refresh()
+
+@app.on_event("startup")
+async def startup():
+    """
+    Створює спільну HTTP-сесію з пулом з'єднань, пул процесів для аналізу HTML
+    і визначає шлях до chromedriver.
+    """
+    await http_fetcher.start()
+    start_process_pool()
+    await asyncio.to_thread(browser_pool.start)
+    await site_log_writer.start()
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Закриває спільну HTTP-сесію, пул процесів та браузери Selenium.
+    """
+    await job_queue.stop()
+    await site_log_writer.stop()
+    await http_fetcher.close()
+    stop_process_pool()
+    if extraction_cache is not None:
+        extraction_cache.close()
+    job_store.close()
+    selenium_executor.shutdown(wait=False, cancel_futures=True)
+    await asyncio.to_thread(browser_pool.close)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
@@ -40,6 +91,97 @@ async def read_root(request: Request):
     """
     return templates.TemplateResponse("index.html", {"request": request})
 
+def yield_ID(start_num=2):
+    """
+    Генератор для створення унікальних ID.
+
+    Args:
+        start_num (int): Початковий номер для генерації ID.
+
+    Yields:
+        str: Унікальний ID.
+    """
+    num = start_num
+    while True:
+        ID = f'1.{num}'
+        yield ID
+        num += 1
+
+def block(url):
+    if blacklist_index.is_blocked(url):
+        logging.info(f'Сайт занесений в blacklist\t\t {url}')
+        return False
+    return True
+
+def limit_text(char_count: int, min_chars: int, max_chars: int, url: str):
+    if char_count < min_chars:
+        logging.info(f'Кількість символів занадто мала\t\t{url}')
+        return False
+    if max_chars != -1 and char_count > max_chars:
+        logging.info(f'Кількість символів занадто велика\t\t{url}')
+        return False
+    return True
+
+def log_unreachable_sites(data):
+    # Тимчасові збої (таймаут, 429/5xx, вимкнений circuit breaker'ом домен) не потрапляють у Blacklist_Domen
+    if data['Status Parsing'] == 'НІ' and data.get('Повторити пізніше') != 'ТАК':
+        try:
+            domain = data["URL"].split("/")[2]
+        except:
+            domain = data["URL"]
+        domain_log.add(domain)
+
+def log_ok_parser(data):
+    if data['Status Parsing'] == 'ТАК':
+        domain = data["URL"]
+        page_log.add(domain)
+
+def accept_result(data, min_chars: int, max_chars: int) -> bool:
+    """
+    Перевіряє результат парсингу одного URL і записує його в журнали.
+
+    Returns:
+        bool: True, якщо результат потрібно зберегти.
+    """
+    if data and limit_text(data['Кількість символів'], min_chars, max_chars, data['URL']):
+        log_ok_parser(data)
+        return True
+    if data:
+        log_unreachable_sites(data)
+    logging.error('Не вдалося отримати дані з URL або зміст сайту недійсний')
+    return False
+
+def read_parse_form(form) -> dict:
+    """
+    Зчитує параметри парсингу з форми.
+    """
+    return {
+        'code_v': form.get('code_v', '0'),  # Значення за замовчуванням
+        'parser_type': form.get('parser_type', 'https'),  # Значення за замовчуванням
+        'min_chars': int(form.get('min_chars', 0)),  # Значення за замовчуванням
+        'max_chars': int(form.get('max_chars', -1)),  # Значення за замовчуванням
+    }
+
+def read_urls(form) -> list:
+    """
+    Зчитує URL з форми (поле url або urls - по одному на рядок) без тих, що в blacklist.
+    """
+    refresh_blacklists()
+    url = form.get('url')
+    urls = [url] if url else (form.get('urls') or '').splitlines()
+    return [url.strip() for url in urls if url.strip() and block(url.strip())]
+
+async def process_job_url(url: str, params: dict):
+    """
+    Обробляє один URL фонової задачі і повертає результат, якщо його потрібно зберегти.
+    """
+    data = await extract_content(url, config.get('ignore_words', []),
+                                 code_v=params['code_v'], parser_type=params['parser_type'])
+    return data if accept_result(data, params['min_chars'], params['max_chars']) else None
+
+# Фонова черга задач парсингу (POST /jobs, GET /jobs/{job_id})
+job_queue = JobQueue(job_store, scheduler, process_job_url, yield_ID)
+
 @app.post("/parse")
 async def parse_url(request: Request):
     """
@@ -49,148 +191,272 @@ async def parse_url(request: Request):
         request (Request): HTTP запит з URL або списком URL.
 
     Returns:
-        HTMLResponse: HTML-сторінка з результатами парсингу або повідомленням про відсутність даних.
+        HTMLResponse: HTML-сторінка з результатами парсингу (з ID задачі) або повідомленням про відсутність даних.
     """
-    global parsed_data
-    parsed_data = pd.DataFrame()  # Сброс данных
-
     form = await request.form()
     url = form.get('url')
     urls = form.get('urls')
-    code_v = form.get('code_v', '0')  # Значення за замовчуванням
-    parser_type = form.get('parser_type', 'https')  # Значення за замовчуванням
-    min_chars = int(form.get('min_chars', 0) ) # Значення за замовчуванням
-    max_chars = int(form.get('max_chars', -1))  # Значення за замовчуванням
+    params = read_parse_form(form)
+    code_v, parser_type = params['code_v'], params['parser_type']
+    min_chars, max_chars = params['min_chars'], params['max_chars']
     ignore_list = config.get('ignore_words', [])
 
-    def yield_ID(start_num=2):
-        """
-        Генератор для створення унікальних ID.
-
-        Args:
-            start_num (int): Початковий номер для генерації ID.
-
-        Yields:
-            str: Унікальний ID.
-        """
-        num = start_num
-        while True:
-            ID = f'1.{num}'
-            yield ID
-            num += 1
-    def block(url):
-        black_list = blacklist('blacklist.txt')
-        for url_stop in black_list:
-            if url_stop == url:
-                logging.info(f'Сайт занесений в blacklist\t\t {url}')
-                return False
-        return True
-    def limit_text(text: BeautifulSoup, min_chars: int, max_chars: int, url: str):
-        text_all = ' '.join(text.stripped_strings)
-        if len(text_all) < min_chars:
-            logging.info(f'Кількість символів занадто мала\t\t{url}')
-            return False
-        if max_chars != -1 and len(text_all) > max_chars:
-            logging.info(f'Кількість символів занадто велика\t\t{url}')
-            return False
-        return True
-
     id_generator = yield_ID()
     all_data = []
 
-    def log_unreachable_sites(data):
-        if data['Status Parsing'] == 'НІ':
-            try:
-                domain = data["URL"].split("/")[2]
-            except:
-                domain = data["URL"]
-            add_unreachable_site('Blacklist_Domen.txt', domain)
-    def log_ok_parser(data):
-        if data['Status Parsing'] == 'ТАК':
-            domain = data["URL"]
-            add_unreachable_site('Blacklist_Page.txt', domain)
-
     if url:
+        refresh_blacklists()
         if block(url):
             data = await extract_content(url, ignore_list, code_v=code_v, parser_type=parser_type)
-            if data and limit_text(data['Content'], min_chars, max_chars, url):
+            if accept_result(data, min_chars, max_chars):
                 data['ID'] = next(id_generator)
-                log_ok_parser(data)
                 all_data.append(data)
             else:
-                logging.error('Не вдалося отримати дані з URL або зміст сайту недійсний')
-                log_unreachable_sites(data)
                 return HTMLResponse(content="<h1>Не вдалося отримати дані з URL або зміст сайту недійсний</h1>", status_code=404)
         else:
             return HTMLResponse(content="<h1>Сайт занесений в blacklist</h1>", status_code=404)
     elif urls:
-        urls = urls.splitlines()
-        tasks = []
-        urls = [url for url in urls if block(url)]
-        for url in urls:
-            url = url.strip()
-            tasks.append(extract_content(url, ignore_list, code_v=code_v, parser_type=parser_type))
-        results = await asyncio.gather(*tasks)
+        urls = read_urls(form)
+        results = await scheduler.run(
+            urls, lambda url: extract_content(url, ignore_list, code_v=code_v, parser_type=parser_type))
         for data in results:
-            if data and limit_text(data['Content'], min_chars, max_chars, url):
-                log_ok_parser(data)
+            if accept_result(data, min_chars, max_chars):
                 data['ID'] = next(id_generator)
                 all_data.append(data)
-            else:
-                log_unreachable_sites(data)
-                logging.error('Не вдалося отримати дані з URL або зміст сайту недійсний')
 
     if all_data:
-        parsed_data = pd.DataFrame(all_data)
-
-    if parsed_data is not None and not parsed_data.empty:
-        return templates.TemplateResponse("parsed_result.html", {"request": request})
+        job_id = job_store.create()
+        job_store.append(job_id, all_data)
+        job_store.finish(job_id)
+        response = templates.TemplateResponse("parsed_result.html", {"request": request, "job_id": job_id})
+        response.headers['X-Job-ID'] = job_id
+        return response
     else:
         return HTMLResponse(content="<h1>No data available</h1>", status_code=404)
 
+@app.post("/parse/stream")
+async def parse_url_stream(request: Request):
+    """
+    Потоковий парсинг URL або списку URL.
+
+    Кожен результат надсилається одразу після обробки окремим рядком JSON (NDJSON):
+    `start` з ID задачі та кількістю URL, `result` для кожного URL з лічильниками прогресу
+    та `end` з підсумком. Результати доступні в `/table` і `/download` за ID задачі.
+
+    Args:
+        request (Request): HTTP запит з URL або списком URL.
+
+    Returns:
+        StreamingResponse: Потік NDJSON.
+    """
+    form = await request.form()
+    urls = read_urls(form)
+    params = read_parse_form(form)
+    ignore_list = config.get('ignore_words', [])
+
+    def event(payload: dict) -> str:
+        return json.dumps(payload, ensure_ascii=False) + '\n'
+
+    async def generate():
+        # Задача створюється, лише коли клієнт почав читати потік, і звільняється навіть при розриві з'єднання
+        job_id = job_store.create()
+        try:
+            id_generator = yield_ID()
+            accepted_count = 0
+            total = len(urls)
+            yield event({'event': 'start', 'job_id': job_id, 'total': total})
+
+            results = scheduler.as_completed(
+                urls, lambda url: extract_content(url, ignore_list, code_v=params['code_v'], parser_type=params['parser_type']))
+            done = 0
+            async for index, data in results:
+                done += 1
+                accepted = accept_result(data, params['min_chars'], params['max_chars'])
+                if accepted:
+                    data['ID'] = next(id_generator)
+                    job_store.append(job_id, [data])
+                    accepted_count += 1
+                yield event({
+                    'event': 'result',
+                    'done': done,
+                    'total': total,
+                    'accepted': accepted_count,
+                    'url': urls[index],
+                    'ok': accepted,
+                    'data': serialize_row(data) if accepted else None,
+                })
+
+            yield event({'event': 'end', 'job_id': job_id, 'done': done, 'total': total, 'accepted': accepted_count})
+        finally:
+            job_store.finish(job_id)
+
+    return StreamingResponse(generate(), media_type='application/x-ndjson')
+
+@app.post("/jobs", response_class=JSONResponse)
+async def submit_job(request: Request):
+    """
+    Ставить URL або список URL у фонову чергу і одразу повертає ID задачі.
+
+    Прогрес і результати доступні в `GET /jobs/{job_id}`, а після завершення - також у `/table` і `/download`.
+
+    Args:
+        request (Request): HTTP запит з URL або списком URL.
+
+    Returns:
+        JSONResponse: ID задачі, кількість URL і статус.
+    """
+    form = await request.form()
+    urls = read_urls(form)
+    if not urls:
+        return JSONResponse(content={"error": "No URLs to parse"}, status_code=400)
+    job_id = job_queue.submit(urls, read_parse_form(form))
+    return JSONResponse(content={"job_id": job_id, "status": "queued", "total": len(urls)}, status_code=202)
+
+@app.get("/jobs/{job_id}", response_class=JSONResponse)
+async def job_status(job_id: str, since: int = 0):
+    """
+    Стан фонової задачі: статус (queued, running, done, failed, expired), прогрес, швидкість обробки
+    та результати, отримані на цей момент. `expired` - задача завершена, але її результати вже
+    видалені зі сховища (перезапуск сервера без `job_store_path`, ліміт задач або TTL).
+
+    Args:
+        job_id (str): ID задачі.
+        since (int): Повернути лише результати, починаючи з цієї позиції (для поступового опитування).
+
+    Returns:
+        JSONResponse: Стан задачі з полем results.
+    """
+    status = job_queue.status(job_id)
+    if status is None:
+        return JSONResponse(content={"error": "Job not found"}, status_code=404)
+    results = job_store.rows(job_id, max(0, since))
+    if results is None and status['status'] == 'done':
+        status['status'] = 'expired'
+    status['results'] = results or []
+    return JSONResponse(content=status)
+
 @app.get("/table", response_class=HTMLResponse)
-async def display_table(request: Request):
+async def display_table(request: Request, job_id: str = None):
     """
-    Відображення таблиці з парсингованими даними.
+    Відображення таблиці з парсингованими даними задачі (за замовчуванням - останньої).
+
+    Сторінка містить лише каркас таблиці - рядки завантажуються частинами з `/table/rows`.
     """
-    if parsed_data is not None:
-        parsed_data_table_view = parsed_data
-        if config.get('cleaned_data_table_view', False):
-            parsed_data_table_view = (
-                parsed_data.apply(lambda x: x.map(lambda y: str(y).replace('\n', '').replace('\r', ' '))))
-        html_table = parsed_data_table_view.to_html(index=False, border=1, classes='data-table')
-        return templates.TemplateResponse("table_view.html", {"request": request, "html_table": html_table})
-    else:
+    job_id = job_id or job_store.latest_job_id
+    parsed_data = job_store.get(job_id)
+    if parsed_data is None or parsed_data.empty:
         return HTMLResponse(content="<h1>No data available</h1>", status_code=404)
+    return templates.TemplateResponse("table_view.html", {"request": request, "job_id": job_id,
+                                                          "columns": list(parsed_data.columns)})
+
+def sort_positions(column: pd.Series, descending: bool) -> np.ndarray:
+    """
+    Позиції рядків, упорядковані за значеннями колонки (порівняння як рядків, якщо типи змішані).
+    """
+    column = column.reset_index(drop=True)
+    try:
+        ordered = column.sort_values(ascending=not descending, kind='stable')
+    except TypeError:
+        ordered = column.astype(str).sort_values(ascending=not descending, kind='stable')
+    return ordered.index.to_numpy()
+
+def cleaned_table_view(job_id: str):
+    """
+    Очищена таблиця задачі, якщо в налаштуваннях увімкнено `cleaned_data_table_view`, інакше None.
+    """
+    if not config.get('cleaned_data_table_view', False):
+        return None
+    return job_store.view(job_id, 'cleaned', clean_table)
+
+@app.get("/table/rows", response_class=JSONResponse)
+async def table_rows(job_id: str = None, offset: int = 0, limit: int = 50, sort: str = None, order: str = 'asc',
+                     status: str = None, domain: str = None, preview: int = 300):
+    """
+    Сторінка рядків таблиці задачі у форматі JSON.
+
+    Args:
+        job_id (str): ID задачі (за замовчуванням - остання).
+        offset (int), limit (int): Зсув і розмір сторінки (не більше 500 рядків).
+        sort (str), order (str): Колонка для сортування та напрям (`asc` або `desc`).
+        status (str): Фільтр за `Status Parsing` (`ТАК` / `НІ`).
+        domain (str): Фільтр за доменом URL (разом з піддоменами).
+        preview (int): Скільки символів довгих значень (наприклад, `Content`) повертати.
+
+    Returns:
+        JSONResponse: Загальна кількість рядків після фільтрів і рядки сторінки з їх позиціями в задачі.
+    """
+    job_id = job_id or job_store.latest_job_id
+    parsed_data = job_store.get(job_id)
+    if parsed_data is None or parsed_data.empty:
+        return JSONResponse(content={"error": "No data available"}, status_code=404)
+    offset, limit, preview = max(0, offset), min(max(1, limit), 500), max(0, preview)
+
+    # Порядок рядків і домени рахуються один раз для задачі, а не для кожної сторінки
+    if sort in parsed_data.columns:
+        descending = order == 'desc'
+        positions = job_store.view(job_id, f'order_{sort}_{int(descending)}',
+                                   lambda frame: sort_positions(frame[sort], descending))
+    else:
+        positions = np.arange(len(parsed_data))
+    mask = np.ones(len(parsed_data), dtype=bool)
+    if status:
+        mask &= (parsed_data['Status Parsing'] == status).to_numpy()
+    if domain:
+        domains = job_store.view(job_id, 'domains', lambda frame: pd.Series(
+            [get_domain(str(url)) for url in frame['URL']], dtype=object))
+        domain = domain.lower()
+        mask &= ((domains == domain) | domains.str.endswith('.' + domain)).to_numpy()
+    positions = positions[mask[positions]]
+
+    cleaned_view = cleaned_table_view(job_id)
+    records = job_store.records(job_id)
+    rows = []
+    for position in positions[offset:offset + limit]:
+        row = serialize_row(cleaned_view.iloc[position].to_dict() if cleaned_view is not None else records[position])
+        truncated = [key for key, value in row.items() if isinstance(value, str) and len(value) > preview]
+        for key in truncated:
+            row[key] = row[key][:preview]
+        rows.append({"position": int(position), "row": row, "truncated": truncated})
+    return JSONResponse(content={"job_id": job_id, "total": len(positions), "offset": offset, "limit": limit,
+                                 "columns": list(parsed_data.columns), "rows": rows})
+
+@app.get("/table/rows/{position}", response_class=JSONResponse)
+async def table_row(position: int, job_id: str = None):
+    """
+    Повний рядок задачі за його позицією (для перегляду всієї статті).
+    """
+    job_id = job_id or job_store.latest_job_id
+    rows = job_store.records(job_id)
+    if not rows or not 0 <= position < len(rows):
+        return JSONResponse(content={"error": "Row not found"}, status_code=404)
+    # Рядок береться з того самого подання, що й у `/table/rows`
+    cleaned_view = cleaned_table_view(job_id)
+    row = cleaned_view.iloc[position].to_dict() if cleaned_view is not None else rows[position]
+    return JSONResponse(content={"job_id": job_id, "position": position, "row": serialize_row(row)})
 
 @app.get("/download")
-async def download_file(filetype: str = "xlsx"):
+async def download_file(filetype: str = "xlsx", job_id: str = None):
     """
-    Завантаження файлів у різних форматах (xlsx, csv, xml).
+    Завантаження файлів у різних форматах (xlsx, csv, xml) для задачі (за замовчуванням - останньої).
+
+    Файли формуються з рядків задачі по одному і передаються клієнту потоком (xml - ZIP-архів).
     """
-    if parsed_data is None:
+    job_id = job_id or job_store.latest_job_id
+    rows = job_store.records(job_id)
+    if not rows:
         return HTMLResponse(content="<h1>No data available</h1>", status_code=404)
-    parsed_data_save = parsed_data
-    if config.get('cleaned_data_save', False):
-        parsed_data_save = (
-            parsed_data.apply(lambda x: x.map(lambda y: str(y).replace('\n', '').replace('\r', ' '))))
-    files_response = await convert_data_to_files(parsed_data_save, filetype)
-
-    if isinstance(files_response, str):  # файл архіву
-        return FileResponse(
-            path=files_response,
-            media_type='application/zip',
-            filename=os.path.basename(files_response)
-        )
-    elif isinstance(files_response, tuple) and len(files_response) == 2:
-        file_path, media_type = files_response
-        return FileResponse(
-            path=file_path,
-            media_type=media_type,
-            filename=os.path.basename(file_path)
-        )
+    cleaned = bool(config.get('cleaned_data_save', False))
+    if filetype == 'csv':
+        content, media_type, extension = iter_csv(rows, cleaned), 'text/csv', 'csv'
+    elif filetype == 'xlsx':
+        content, extension = iter_xlsx(rows, cleaned), 'xlsx'
+        media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    elif filetype == 'xml':
+        content, media_type, extension = iter_xml_zip(rows, cleaned), 'application/zip', 'zip'
     else:
         return HTMLResponse(content="<h1>Unsupported file type</h1>", status_code=400)
+    return StreamingResponse(content, media_type=media_type, headers={
+        'Content-Disposition': f'attachment; filename="parsed_content_{job_id}.{extension}"'})
 
 @app.post("/search", response_class=JSONResponse)
 async def search_google(request: Request):
@@ -0,0 +1,213 @@
+"""
+Цей модуль містить індекси списків сайтів, які використовує `app.py`.
+
+## Класи
+
+- **`BlacklistIndex`**: Індекс `blacklist.txt` у пам'яті. Рядок файлу може бути точним URL,
+  доменом (`example.com` - блокує домен і всі піддомени) або префіксом шляху, що закінчується
+  на `*` (`https://example.com/news/*`). Точні URL і домени зберігаються в множинах,
+  префікси - у префіксному дереві, тому перевірка одного URL не залежить від розміру списку.
+- **`SiteLog`**: Множина рядків журналу (`Blacklist_Page.txt`, `Blacklist_Domen.txt`) у пам'яті.
+  Новий сайт дописується у файл лише один раз, без повторного читання файлу.
+- **`SiteLogWriter`**: Фонова задача, яка записує нові сайти журналів пакетами
+  (кожні `site_log_flush_items` сайтів або `site_log_flush_interval` секунд і при зупинці сервера).
+
+`BlacklistIndex` і `SiteLog` перечитують файл, лише якщо змінився час його модифікації (`refresh()`).
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Set
+
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+# Позначка кінця префікса у вузлі дерева
+_END = ''
+
+
+def _host(url: str) -> str:
+    """Хост URL у нижньому регістрі (без urlsplit, який помітно повільніший на великих пакетах)."""
+    start = url.find('://')
+    netloc = url[start + 3:] if start != -1 else url
+    for separator in '/?#':
+        end = netloc.find(separator)
+        if end != -1:
+            netloc = netloc[:end]
+    netloc = netloc.rpartition('@')[2]
+    if netloc.startswith('['):
+        return netloc.lower()
+    return netloc.partition(':')[0].lower()
+
+
+class BlacklistIndex:
+    """Індекс blacklist.txt: точні URL, домени та префікси шляхів."""
+
+    def __init__(self, path: str = 'blacklist.txt'):
+        self.path = path
+        self._mtime: Optional[float] = -1.0  # ще не завантажено
+        self._urls: Set[str] = set()
+        self._domains: Set[str] = set()
+        self._prefixes: Dict[str, dict] = {}
+
+    def refresh(self):
+        """Перечитує файл, якщо він змінився з моменту попереднього завантаження."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        urls, domains, prefixes = set(), set(), {}
+        if mtime is not None:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    rule = line.strip()
+                    if not rule:
+                        continue
+                    if rule.endswith('*'):
+                        node = prefixes
+                        for char in rule[:-1]:
+                            node = node.setdefault(char, {})
+                        node[_END] = {}
+                    elif '://' not in rule and '/' not in rule:
+                        domains.add(rule.lower().lstrip('.'))
+                    else:
+                        urls.add(rule)
+        self._urls, self._domains, self._prefixes = urls, domains, prefixes
+        logging.info(f'Завантажено {self.path}: {len(urls)} URL, {len(domains)} доменів')
+
+    def _domain_blocked(self, url: str) -> bool:
+        if not self._domains:
+            return False
+        labels = _host(url).split('.')
+        return any('.'.join(labels[i:]) in self._domains for i in range(len(labels)))
+
+    def _prefix_blocked(self, url: str) -> bool:
+        node = self._prefixes
+        if not node:
+            return False
+        for char in url:
+            if _END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return _END in node
+
+    def is_blocked(self, url: str) -> bool:
+        """Перевіряє URL без звернень до диску (файл оновлюється лише в `refresh()`)."""
+        return url in self._urls or self._domain_blocked(url) or self._prefix_blocked(url)
+
+
+class SiteLog:
+    """
+    Журнал сайтів у текстовому файлі (по одному на рядок) з множиною записаних рядків у пам'яті.
+
+    Нові сайти накопичуються в пам'яті і дописуються у файл пакетами (`SiteLogWriter`).
+    Без запущеного `SiteLogWriter` кожен сайт записується одразу.
+    """
+
+    def __init__(self, path: str, flush_items: Optional[int] = None):
+        self.path = path
+        self.flush_items = max(1, flush_items or config.get('site_log_flush_items', 100))
+        self._mtime: Optional[float] = None
+        self._sites: Set[str] = set()
+        self._pending: List[str] = []
+        self._full: Optional[asyncio.Event] = None
+
+    def refresh(self):
+        """Перечитує файл, якщо його змінили ззовні (ще не записані сайти зберігаються)."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            self._mtime, self._sites = None, set(self._pending)
+            return
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self._sites = set(file.read().splitlines()) | set(self._pending)
+            self._mtime = mtime
+
+    def __contains__(self, site: str) -> bool:
+        return site in self._sites
+
+    def add(self, site: str):
+        """Додає сайт, якщо його ще немає в журналі. Запис у файл відбувається пізніше пакетом."""
+        if self._mtime is None:
+            self.refresh()
+        if site in self._sites:
+            logging.info(f"Сайт {site} вже є у тимчасовому списку недоступних.")
+            return
+        self._sites.add(site)
+        self._pending.append(site)
+        logging.info(f"Сайт {site} додано до тимчасового списку недоступних.")
+        if self._full is None:
+            self.write(self.take_pending())
+        elif len(self._pending) >= self.flush_items:
+            self._full.set()
+
+    def take_pending(self) -> List[str]:
+        """Забирає сайти, які ще не записані у файл."""
+        pending, self._pending = self._pending, []
+        return pending
+
+    def write(self, sites: List[str]):
+        """Дописує сайти у файл одним записом."""
+        if not sites:
+            return
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(''.join(site + '\n' for site in sites))
+        self._mtime = os.stat(self.path).st_mtime
+
+
+class SiteLogWriter:
+    """Фонова задача, яка записує нові сайти журналів кожні N сайтів або T секунд і при зупинці."""
+
+    def __init__(self, logs: List[SiteLog], interval: Optional[float] = None):
+        self.logs = logs
+        self.interval = interval if interval is not None else config.get('site_log_flush_interval', 5)
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Запускає фонову задачу запису."""
+        self._event = asyncio.Event()
+        for log in self.logs:
+            log._full = self._event
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=self.interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._event.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Записує всі накопичені сайти у файли."""
+        for log in self.logs:
+            sites = log.take_pending()
+            if not sites:
+                continue
+            try:
+                await asyncio.to_thread(log.write, sites)
+            except OSError as e:
+                logging.error(f'Не вдалося записати {log.path}: {str(e)}')
+                log._pending[:0] = sites
+
+    async def stop(self):
+        """Зупиняє фонову задачу і записує все, що залишилося."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for log in self.logs:
+            log._full = None
+        await self.flush()
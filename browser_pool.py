@@ -0,0 +1,158 @@
+"""
+Цей модуль містить пул довгоживучих екземплярів Chrome для `Selenium_Parser`.
+
+## Класи
+
+- **`BrowserPool`**: Тримає до N драйверів Selenium, які видаються на одну сторінку
+  і повертаються назад. Між сторінками драйвер очищується (cookies, about:blank),
+  а після K сторінок або збою - перезапускається.
+
+## Налаштування
+
+- **Конфігурація**: `browser_pool_size`, `browser_max_pages`, `selenium_headless` з `config.yaml`.
+- **Драйвер**: Шлях до chromedriver визначається один раз у `start()`.
+"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from config_chrome_options import chrome_options
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+
+class BrowserPool:
+    """Пул драйверів Chrome, які перевикористовуються між сторінками."""
+
+    def __init__(self, size: Optional[int] = None, max_pages: Optional[int] = None):
+        self.size = max(1, size or config.get('browser_pool_size', 2))
+        self.max_pages = max(1, max_pages or config.get('browser_max_pages', 50))
+        self.headless = bool(config.get('selenium_headless', 1))
+        self.driver_path: Optional[str] = None
+        self._resolved = False
+        self._lock = threading.Lock()
+        # Кожен слот - або готовий драйвер, або None (драйвер створюється при першій видачі)
+        self._slots: queue.Queue = queue.Queue()
+        for _ in range(self.size):
+            self._slots.put(None)
+        self._pages: Dict[int, int] = {}
+        # Усі створені й ще не закриті драйвери (вільні і видані), щоб close() закрив кожен
+        self._drivers: Dict[int, webdriver.Chrome] = {}
+        self._closed = False
+
+    def start(self):
+        """Один раз визначає шлях до chromedriver."""
+        with self._lock:
+            if self._resolved:
+                return
+            try:
+                self.driver_path = ChromeDriverManager().install()
+                logging.info(f'Chromedriver: {self.driver_path}')
+            except Exception as e:
+                # Selenium Manager знайде драйвер сам, якщо webdriver_manager недоступний
+                logging.error(f'Не вдалося встановити chromedriver: {str(e)}')
+                self.driver_path = None
+            self._resolved = True
+
+    def _create_driver(self) -> webdriver.Chrome:
+        self.start()
+        service = Service(self.driver_path) if self.driver_path else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options(headless=self.headless))
+        self._pages[id(driver)] = 0
+        with self._lock:
+            self._drivers[id(driver)] = driver
+        logging.info('Створено новий екземпляр браузера')
+        return driver
+
+    def _quit_driver(self, driver: webdriver.Chrome):
+        self._pages.pop(id(driver), None)
+        with self._lock:
+            if self._drivers.pop(id(driver), None) is None:
+                return  # вже закритий у close()
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f'Помилка при закритті драйвера Selenium: {str(e)}')
+
+    @staticmethod
+    def _reset_driver(driver: webdriver.Chrome):
+        """Очищує стан браузера перед наступною сторінкою."""
+        try:
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception:
+            driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    @contextmanager
+    def driver(self):
+        """
+        Видає драйвер з пулу на час обробки однієї сторінки.
+
+        Якщо всі драйвери зайняті, чекає, поки якийсь звільниться.
+        """
+        driver = self._slots.get()
+        try:
+            if driver is None:
+                driver = self._create_driver()
+        except Exception:
+            self._slots.put(None)
+            raise
+
+        try:
+            yield driver
+        except Exception:
+            # Після збою стан браузера невідомий - перезапускаємо його
+            self._quit_driver(driver)
+            if not self._closed:
+                self._slots.put(None)
+            raise
+
+        if self._closed:
+            # Після close() повернутий драйвер не кладеться назад у пул, а закривається
+            self._quit_driver(driver)
+            return
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+        if self._pages[id(driver)] >= self.max_pages:
+            self._quit_driver(driver)
+            self._slots.put(None)
+            return
+        try:
+            self._reset_driver(driver)
+        except Exception as e:
+            logging.error(f'Не вдалося очистити браузер, перезапуск: {str(e)}')
+            self._quit_driver(driver)
+            driver = None
+        self._slots.put(driver)
+
+    def close(self):
+        """
+        Закриває всі драйвери пулу, зокрема ті, що зараз видані потокам Selenium.
+
+        Драйвер, який повертають у пул після close(), одразу закривається.
+        """
+        self._closed = True
+        with self._lock:
+            drivers = list(self._drivers.values())
+        for driver in drivers:
+            self._quit_driver(driver)
+        while True:
+            try:
+                self._slots.get_nowait()
+            except queue.Empty:
+                break
+        for _ in range(self.size):
+            self._slots.put(None)
+
+
+# Єдиний пул на процес
+browser_pool = BrowserPool()
@@ -1,11 +1,12 @@
 from selenium.webdriver.chrome.options import Options
 
-def chrome_options():
+def chrome_options(headless: bool = False):
     # Налаштування ChromeOptions
     chrome_options = Options()
 
     # Запуск браузера в прихованому режимі
-    # chrome_options.add_argument("--headless")  # Прихований режим
+    if headless:
+        chrome_options.add_argument("--headless=new")  # Прихований режим
     chrome_options.add_argument("--disable-gpu")  # Вимкнути апаратне прискорення
     chrome_options.add_argument("--no-sandbox")  # Вимкнути пісочницю
     chrome_options.add_argument("--disable-dev-shm-usage")  # Вимкнути спільне використання пам'яті
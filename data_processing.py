@@ -3,10 +3,10 @@
 
 ## Імпортовані бібліотеки
 
-- `logging`, `re`, `random`, `os`: стандартні бібліотеки Python.
+- `logging`, `re`, `os`, `csv`, `zipfile`: стандартні бібліотеки Python.
 - `pandas`: для обробки даних.
 - `BeautifulSoup`: для роботи з HTML.
-- `FastAPI`: для обробки HTTP відповідей.
+- `openpyxl`: для експорту в XLSX.
 - `utils`: для допоміжних функцій.
 
 ## Налаштування
@@ -17,85 +17,168 @@
 ## Функції
 
 - **`save_parsed_data(data)`**: Зберігає парсингові дані в DataFrame.
-- **`convert_data_to_files(parsed_data, filetype)`**: Конвертує дані в формат `xlsx`, `csv`, або `xml` і повертає шлях до файлу.
+- **`clean_table(frame)`**: Векторне очищення таблиці від переносів рядків для перегляду.
+- **`iter_csv(rows, cleaned)`**, **`iter_xlsx(rows, cleaned)`**: Потоковий експорт рядків результатів у CSV / XLSX
+  частинами байтів (рядки серіалізуються по одному, без DataFrame).
+- **`iter_xml_zip(rows, cleaned)`**: Потоковий ZIP-архів з окремим XML-файлом для кожного рядка (без тимчасових файлів).
 - **`remove_unwanted_tags(html_content)`**: Видаляє небажані теги і стилі з HTML-контенту.
 - **`clean_html_tags(soup)`**: Видаляє конкретні теги з HTML-контенту.
 - **`should_ignore(text, ignore_list)`**: Перевіряє, чи текст містить стоп-слова.
 - **`replace_img_tags(content_html, base_url)`**: Замінює теги `<img>` на абсолютні URL.
 - **`remove_html_attributes(html_content)`**: Видаляє вказані атрибути з HTML-контенту.
+- **`clean_html_lxml(html_content, base_url)`**: Рушій lxml - усе очищення та заміна URL зображень за один обхід.
+- **`html_plain_text(html_content)`**: Текст HTML-фрагмента (для кількості символів і колонки `Text`).
 - **`extract_content_after_h1(soup)`**: Витягує контент після першого `<h1>` до стопових слів.
 
 
 """
 
+import csv
+import io
 import logging
 import re
-from typing import List
+import tempfile
+import zipfile
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
 from urllib.parse import urljoin
 import pandas as pd
-import random
 import os
 from bs4 import BeautifulSoup
-from utils import html_to_xml, create_zip_archive, load_config
-from fastapi.responses import HTMLResponse, FileResponse
+from lxml import etree
+from lxml import html as lxml_html
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from utils import iter_html_to_xml, load_config
 
 logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 config = load_config('config.yaml')
 
+# Скомпільований XPath для рушія lxml: усі теги з tags_to_del за один запит
+_tags_to_del_xpath = etree.XPath(
+    ' | '.join(f'descendant::{tag}' for tag in config.get('tags_to_del', [])) or 'descendant::*[false()]')
+
 
 def save_parsed_data(data):
     """Зберігає результати парсингу в DataFrame."""
     return pd.DataFrame([data])
 
 
-async def convert_data_to_files(parsed_data: pd.DataFrame, filetype: str):
-    """Конвертує дані в потрібний формат і повертає шлях до файлу."""
-    files = []
-    try:
-        file_name_prefix = f'static/parsed_content_{random.randint(1000, 9999)}'
-
-        if filetype == "xlsx":
-            file_path = f'{file_name_prefix}.xlsx'
-            # Збереження даних у форматі Excel за допомогою openpyxl через pandas
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                parsed_data.to_excel(writer, index=False)
-            media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            files.append(file_path)
-
-        elif filetype == "csv":
-            file_path = f'{file_name_prefix}.csv'
-            parsed_data.to_csv(file_path, index=False)
-            media_type = 'text/csv'
-            files.append(file_path)
-
-        elif filetype == "xml":
-            for _, row in parsed_data.iterrows():
-                title = row['Title']
-                content = row['Content']
-                safe_title = re.sub(r'[\/\\:*?"<>|]', '_', title)
-                file_name = f'static/{safe_title}_{random.randint(1000, 9999)}.xml'
-                xml_data = html_to_xml(content)
-                with open(file_name, 'w', encoding='utf-8') as file:
-                    file.write(xml_data)
-                files.append(file_name)
-
-            media_type = 'application/zip'
-            zip_file_path = f'{file_name_prefix}.zip'
-            create_zip_archive(files, zip_file_path)
-            logging.info(f"Created ZIP archive at: {zip_file_path}")
-            return zip_file_path, media_type
+# Розмір частини, якою файл експорту віддається клієнту
+EXPORT_CHUNK_SIZE = 64 * 1024
 
-        else:
-            return HTMLResponse(content="<h1>Unsupported file type</h1>", status_code=400)
 
-        logging.info(f"Generated file: {files[0]} with media type: {media_type}")
-        return files[0], media_type
+def clean_table(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Очищена копія таблиці (cleaned_data_*): усі значення як рядки, без '\\n', '\\r' замінено на пробіл.
+
+    Заміна виконується векторно для цілих колонок, а не окремим викликом для кожної комірки.
+    """
+    # У pandas 3 astype(str) залишає пропуски як NaN, а str() перетворює їх на 'nan'
+    cleaned = frame.astype(str).fillna('nan')
+    for column in cleaned.columns:
+        cleaned[column] = cleaned[column].str.replace('\n', '', regex=False).str.replace('\r', ' ', regex=False)
+    return cleaned
 
-    except Exception as e:
-        logging.error(f"Error generating file: {e}")
-        return HTMLResponse(content=f"<h1>Error generating file: {e}</h1>", status_code=500)
+
+def export_columns(rows: List[dict]) -> List[str]:
+    """Колонки таблиці в порядку першої появи (як у DataFrame з цих рядків)."""
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def export_value(value, cleaned: bool, xlsx: bool = False):
+    """
+    Значення комірки для експорту. cleaned - прибрати переноси рядків (cleaned_data_save).
+
+    xlsx - прибрати керівні символи, які openpyxl не дозволяє записати в комірку (IllegalCharacterError):
+    у потоковій відповіді помилка посеред файлу дала б клієнту обрізаний файл зі статусом 200.
+    """
+    if cleaned:
+        value = str(value).replace('\n', '').replace('\r', ' ')
+    elif value is None or isinstance(value, (bool, int, float)):
+        return value
+    else:
+        value = str(value)
+    return ILLEGAL_CHARACTERS_RE.sub('', value) if xlsx else value
+
+
+def iter_csv(rows: List[dict], cleaned: bool = False) -> Iterator[bytes]:
+    """Серіалізує рядки результатів у CSV і віддає файл частинами."""
+    columns = export_columns(rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=os.linesep)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([export_value(row.get(column), cleaned) for column in columns])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_xlsx(rows: List[dict], cleaned: bool = False) -> Iterator[bytes]:
+    """
+    Серіалізує рядки результатів у XLSX (openpyxl у режимі write-only) і віддає файл частинами.
+
+    Готовий файл тримається у тимчасовому файлі, який лишається в пам'яті лише поки він невеликий.
+    """
+    columns = export_columns(rows)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([export_value(row.get(column), cleaned, xlsx=True) for column in columns])
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(EXPORT_CHUNK_SIZE):
+            yield chunk
+
+
+class _ChunkSink(io.RawIOBase):
+    """Потік без перемотування, у який ZipFile пише архів; записане забирається частинами."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def iter_xml_zip(rows: List[dict], cleaned: bool = False) -> Iterator[bytes]:
+    """
+    Будує ZIP-архів з XML-файлом для кожного рядка і віддає його частинами по мірі додавання файлів.
+
+    Архів пишеться в потік без перемотування, тому ні архів, ні окремі XML не зберігаються на диску.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for position, row in enumerate(rows, 1):
+            safe_title = re.sub(r'[\/\\:*?"<>|]', '_', str(row.get('Title', '')))
+            with archive.open(f'{safe_title}_{position}.xml', 'w') as entry:
+                for xml_chunk in iter_html_to_xml(export_value(row.get('Content', ''), cleaned)):
+                    entry.write(xml_chunk.encode('utf-8'))
+                    chunk = sink.take()
+                    if chunk:
+                        yield chunk
+    yield sink.take()
 
 
 def remove_unwanted_tags(html_content: BeautifulSoup) -> BeautifulSoup:
@@ -124,44 +207,75 @@ def clean_html_tags(soup: BeautifulSoup) -> BeautifulSoup:
     return soup
 
 
+@lru_cache(maxsize=32)
+def compile_ignore_matcher(ignore_words: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """
+    Компілює список стоп-фраз в один регулярний вираз для пошуку за один прохід тексту.
+
+    Фрази шукаються в межах одного речення, тому фрази з '.', '!' або '?' ніколи не збігаються
+    і в вираз не потрапляють.
+    """
+    phrases = sorted({phrase.lower() for phrase in ignore_words if not re.search(r'[.!?]', phrase)},
+                     key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile('|'.join(re.escape(phrase) for phrase in phrases))
+
+
+# Стоп-фрази з config.yaml компілюються один раз при завантаженні модуля
+compile_ignore_matcher(tuple(config.get('ignore_words', [])))
+
+
 def should_ignore(text: str, ignore_list: List[str]) -> bool:
     """Перевіряє, чи текст містить будь-яке з стоп-слова."""
-    sentences = re.split(r'[.!?]', text)
-    for sentence in sentences:
-        for phrase in ignore_list:
-            if phrase.lower() in sentence.lower():
-                print(f"Stopping because phrase '{phrase}' found in sentence: '{sentence.strip()}'")
-                return True
+    matcher = compile_ignore_matcher(tuple(ignore_list))
+    if matcher is None:
+        return False
+    if 'Σ' in text:
+        # Σ.lower() залежить від сусідніх літер (кінцева сигма), а '.' при цьому пропускається,
+        # тому такий текст, як і раніше, переводиться в нижній регістр окремо по реченнях
+        lowered = '.'.join(sentence.lower() for sentence in re.split(r'[.!?]', text))
+    else:
+        lowered = text.lower()
+    match = matcher.search(lowered)
+    if match:
+        logging.info(f"Знайдено стоп-фразу '{match.group(0)}'")
+        return True
     return False
 
 
+def _rewrite_image_attrs(attrs, base_url: str, img_tags_list: List[str], now_base__url_image: str):
+    """Переписує URL у атрибутах одного тегу <img> (attrs - словник атрибутів bs4 або lxml)."""
+    for attr in img_tags_list:
+        src = attrs.get(attr)
+        if now_base__url_image == '':
+            if src:
+                absolute_url = urljoin(base_url, src)
+                attrs[attr] = absolute_url
+
+            srcset = attrs.get('srcset')
+            if srcset:
+                srcset = re.sub(r'https?://[^\s]+', lambda m: urljoin(base_url, m.group(0)), srcset)
+                attrs['srcset'] = srcset
+        else:
+            if src:
+                # Отримуємо тільки назву файлу із шляху
+                filename = os.path.basename(src)
+                # Створюємо новий абсолютний URL з новим base_url і назвою файлу
+                absolute_url = urljoin(now_base__url_image, filename)
+                attrs[attr] = absolute_url
+            srcset = attrs.get('srcset')
+            if srcset:
+                srcset = re.sub(r'[^,\s]+', lambda m: urljoin(now_base__url_image, os.path.basename(m.group(0))), srcset)
+                attrs['srcset'] = srcset
+
+
 def replace_img_tags(content_html: BeautifulSoup, base_url: str) -> BeautifulSoup:
     img_tags_list = config.get('image_src_attributes', [])
     now_base__url_image = config.get('now_base_url_image', '')
 
     for img_tag in content_html.find_all('img'):
-        for attr in img_tags_list:
-            src = img_tag.get(attr)
-            if now_base__url_image == '':
-                if src:
-                    absolute_url = urljoin(base_url, src)
-                    img_tag[attr] = absolute_url
-
-                srcset = img_tag.get('srcset')
-                if srcset:
-                    srcset = re.sub(r'https?://[^\s]+', lambda m: urljoin(base_url, m.group(0)), srcset)
-                    img_tag['srcset'] = srcset
-            else:
-                if src:
-                    # Отримуємо тільки назву файлу із шляху
-                    filename = os.path.basename(src)
-                    # Створюємо новий абсолютний URL з новим base_url і назвою файлу
-                    absolute_url = urljoin(now_base__url_image, filename)
-                    img_tag[attr] = absolute_url
-                srcset = img_tag.get('srcset')
-                if srcset:
-                    srcset = re.sub(r'[^,\s]+', lambda m: urljoin(now_base__url_image, os.path.basename(m.group(0))), srcset)
-                    img_tag['srcset'] = srcset
+        _rewrite_image_attrs(img_tag.attrs, base_url, img_tags_list, now_base__url_image)
 
     return content_html
 def _replace_img_tags(content_html: BeautifulSoup, base_url: str) -> BeautifulSoup:
@@ -202,6 +316,67 @@ def remove_html_attributes(html_content: BeautifulSoup) -> BeautifulSoup:
     return html_content
 
 
+def clean_html_lxml(html_content: str, base_url: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Рушій lxml: робить те саме, що clean_html_tags, remove_unwanted_tags,
+    remove_html_attributes і replace_img_tags, але за один обхід дерева.
+
+    :param html_content: HTML-фрагмент статті.
+    :param base_url: URL сторінки для побудови абсолютних URL зображень.
+    :return: Очищений HTML, URL зображень до заміни, URL зображень після заміни.
+    """
+    tags_to_remove = set(config.get('tags_to_remove', []))
+    attributes_to_remove = list(config.get('attributes_to_remove', []))
+    if config.get('remove_style_attributes', False):
+        attributes_to_remove.append('style')
+    img_tags_list = config.get('image_src_attributes', [])
+    now_base__url_image = config.get('now_base_url_image', '')
+
+    root = lxml_html.fragment_fromstring(html_content, create_parent='div')
+
+    # Видаляємо теги разом із вмістом (аналог clean_html_tags)
+    for element in _tags_to_del_xpath(root):
+        element.drop_tree()
+
+    images = []
+    to_unwrap = []
+    for element in root.iter():
+        if not isinstance(element.tag, str) or element is root:
+            continue  # Коментарі та службові вузли
+        attrs = element.attrib
+        for attr in attributes_to_remove:
+            if attr in attrs:
+                del attrs[attr]
+        if element.tag in tags_to_remove:
+            to_unwrap.append(element)
+        if element.tag == 'img':
+            images.append(element)
+
+    image_urls_original = [urljoin(base_url, img.get('src')) for img in images if img.get('src')]
+    for img in images:
+        _rewrite_image_attrs(img.attrib, base_url, img_tags_list, now_base__url_image)
+    image_urls = [urljoin(base_url, img.get('src')) for img in images if img.get('src')]
+
+    # Видаляємо теги, залишаючи вміст (аналог remove_unwanted_tags)
+    for element in to_unwrap:
+        element.drop_tag()
+
+    cleaned = (root.text or '') + ''.join(lxml_html.tostring(child, encoding='unicode') for child in root)
+    return cleaned, image_urls_original, image_urls
+
+
+# Текстові вузли без вмісту script/style/template (як у BeautifulSoup.stripped_strings)
+_plain_text_xpath = etree.XPath('//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]')
+
+
+def html_plain_text(html_content: str) -> str:
+    """Текст HTML-фрагмента: непорожні текстові вузли без пробілів по краях, через пробіл."""
+    if not html_content.strip():
+        return ''
+    root = lxml_html.fragment_fromstring(html_content, create_parent='div')
+    return ' '.join(text for text in (node.strip() for node in _plain_text_xpath(root)) if text)
+
+
 def extract_content_after_h1(soup: BeautifulSoup) -> BeautifulSoup:
     """Витягує контент після першого тегу <h1> до стопових слів."""
     first_h1 = soup.find('h1')
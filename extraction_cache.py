@@ -0,0 +1,104 @@
+"""
+Цей модуль містить кеш результатів аналізу сторінок для `analysis_html`.
+
+## Класи
+
+- **`ExtractionCache`**: Зберігає готовий словник результату `analyze_page` у SQLite.
+  Ключ - SHA-256 від сирого HTML, URL, режиму `code_v`, списку стоп-слів та відбитка
+  налаштувань очищення з `config.yaml`. Незмінна сторінка з незмінними налаштуваннями
+  обробляється одним пошуком у кеші, а зміна налаштувань робить недійсними лише записи
+  зі старим відбитком. Кількість записів обмежена `extraction_cache_max_entries` (LRU).
+
+## Налаштування
+
+- **Конфігурація**: `extraction_cache`, `extraction_cache_path`, `extraction_cache_max_entries` з `config.yaml`.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+# Ключі config.yaml, від яких залежить результат analyze_page
+FINGERPRINT_KEYS = ('engine', 'tags_to_del', 'tags_to_remove', 'attributes_to_remove', 'remove_style_attributes',
+                    'image_src_attributes', 'now_base_url_image', 'now_base__url_image', 'store_plain_text')
+
+# Версія формату результату: збільшується, коли змінюються колонки, які повертає analyze_page
+RESULT_VERSION = 2
+
+
+def config_fingerprint() -> str:
+    """Відбиток налаштувань очищення, від яких залежить результат аналізу."""
+    values = {key: config.get(key) for key in FINGERPRINT_KEYS}
+    values['result_version'] = RESULT_VERSION
+    return hashlib.sha256(json.dumps(values, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ExtractionCache:
+    """Кеш результатів аналізу сторінок у SQLite з обмеженням кількості записів."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or config.get('extraction_cache_path', 'cache/extraction_cache.sqlite3')
+        self.max_entries = max_entries if max_entries is not None else config.get('extraction_cache_max_entries', 5000)
+        self.fingerprint = config_fingerprint()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, data BLOB, accessed REAL);'
+                'CREATE INDEX IF NOT EXISTS extractions_accessed ON extractions (accessed);')
+        return self._db
+
+    def key(self, url: str, page_source: str, code_v: str, ignore_list: List[str]) -> str:
+        """Ключ кешу для сторінки з поточними налаштуваннями."""
+        digest = hashlib.sha256(page_source.encode('utf-8', errors='replace'))
+        digest.update(json.dumps([url, str(code_v), list(ignore_list), self.fingerprint],
+                                 ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Повертає збережений результат або None."""
+        with self._lock:
+            db = self._connect()
+            row = db.execute('SELECT data FROM extractions WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            with db:
+                db.execute('UPDATE extractions SET accessed = ? WHERE key = ?', (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, data: dict):
+        """Зберігає результат і видаляє найстаріші записи понад ліміт."""
+        blob = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute('INSERT OR REPLACE INTO extractions (key, data, accessed) VALUES (?, ?, ?)',
+                           (key, blob, time.time()))
+                if self.max_entries:
+                    db.execute('DELETE FROM extractions WHERE key IN (SELECT key FROM extractions'
+                               ' ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def close(self):
+        """Закриває з'єднання з SQLite."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
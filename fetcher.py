@@ -0,0 +1,388 @@
+"""
+Цей модуль містить спільний HTTP-клієнт, яким користується `Https_Parser`.
+
+## Класи
+
+- **`HttpFetcher`**: Володіє однією `aiohttp.ClientSession` з налаштованим `TCPConnector`
+  на весь час роботи застосунку. З'єднання (DNS, TCP, TLS) перевикористовуються
+  між запитами до одного домену. Якщо увімкнено `http_cache`, відповіді кешуються на диску
+  (`ResponseCache`) і прострочені записи перевіряються умовними запитами.
+  Тіло читається частинами і не більше `max_body_size_mb`; відповіді з типом вмісту поза
+  `allowed_content_types` не завантажуються. Тимчасові збої (помилки з'єднання, таймаути,
+  408/429/5xx) повторюються з експоненційною затримкою з джитером, з урахуванням `Retry-After`.
+- **`DomainCircuitBreaker`**: Після `circuit_breaker_failures` збоїв поспіль до домену
+  перестає надсилати йому запити на `circuit_breaker_cooldown` секунд. Після паузи пропускає
+  один пробний запит (half-open): успіх відновлює домен, збій вимикає його знову.
+- **`FetchResult`**: Текст сторінки разом з кодуванням, яким його декодовано, або причина,
+  з якої сторінку не отримано, і ознака тимчасового збою.
+
+## Функції
+
+- **`decode_body(body, header_charset)`**: Декодує байти сторінки. Порядок: BOM, charset із
+  заголовка `Content-Type`, `<meta charset>` з перших `encoding_sniff_bytes` байтів, UTF-8,
+  і лише потім детектор `charset_normalizer` (`detect_encoding`) на перших `encoding_detect_bytes` байтах.
+  Оголошене кодування приймається, тільки якщо тіло декодується ним без помилок;
+  валідний UTF-8 з не-ASCII байтами має перевагу над оголошеним однобайтовим кодуванням.
+  latin-1/ascii/cp1252 із заголовка поступаються `<meta charset>`, а для не-ASCII тіла без
+  `<meta>` приймаються, лише якщо детектор не запропонував іншого кодування.
+
+## Налаштування
+
+- **Конфігурація**: Ліміти з'єднань, keep-alive, TTL кешу DNS, `max_body_size_mb`,
+  `allowed_content_types`, параметри повторів (`retry_*`) і circuit breaker (`circuit_breaker_*`)
+  завантажуються з `config.yaml`.
+- **Життєвий цикл**: `start()` викликається при старті FastAPI, `close()` - при зупинці.
+"""
+import asyncio
+import codecs
+import logging
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import aiohttp
+from charset_normalizer import from_bytes
+
+from response_cache import ResponseCache
+from scheduler import get_domain
+from utils import get_status_description, load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+}
+
+# <meta charset="..."> і <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([a-z0-9_.:-]+)', re.IGNORECASE)
+XML_ENCODING = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([a-z0-9_.:-]+)', re.IGNORECASE)
+
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+# Розмір частини, якою читається тіло відповіді
+CHUNK_SIZE = 64 * 1024
+
+# Статуси, після яких запит має сенс повторити
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Як і браузери, latin-1 та ascii з заголовків читаємо як windows-1252
+ENCODING_ALIASES = {'iso8859-1': 'cp1252', 'ascii': 'cp1252'}
+
+# Однобайтові латинські кодування декодують майже будь-які байти без помилок, тому перевірка
+# декодуванням їх не відкидає. Сервери часто ставлять їх за замовчуванням, тож для не-ASCII тіла
+# такому оголошенню віримо, лише якщо детектор не запропонував нічого кращого.
+WEAK_ENCODINGS = {'cp1252', 'iso8859-15'}
+
+
+class FetchResult(NamedTuple):
+    """
+    Текст сторінки і кодування, яким його декодовано. Якщо сторінку не отримано - error містить причину,
+    а transient показує, що збій тимчасовий (сайт варто спробувати пізніше).
+    """
+    text: str
+    encoding: str
+    error: str = ''
+    transient: bool = False
+
+
+def _normalize_encoding(name) -> Optional[str]:
+    """Канонічна назва кодування Python або None, якщо кодування невідоме."""
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    if not name:
+        return None
+    try:
+        name = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    return ENCODING_ALIASES.get(name, name)
+
+
+def sniff_meta_charset(prefix: bytes) -> Optional[str]:
+    """Кодування з XML-декларації або <meta charset> на початку документа."""
+    match = XML_ENCODING.search(prefix) or META_CHARSET.search(prefix)
+    return _normalize_encoding(match.group(1)) if match else None
+
+
+def decode_body(body: bytes, header_charset: Optional[str] = None) -> FetchResult:
+    """
+    Декодує тіло сторінки, не запускаючи детектор на всьому документі.
+
+    :param body: Байти відповіді.
+    :param header_charset: charset із заголовка Content-Type (може бути неправильним або відсутнім).
+    """
+    for bom, encoding in BOMS:
+        if body.startswith(bom):
+            return FetchResult(body.decode(encoding, errors='replace'), encoding)
+
+    header = _normalize_encoding(header_charset)
+    meta = sniff_meta_charset(body[:config.get('encoding_sniff_bytes', 4096)])
+    if header in WEAK_ENCODINGS and meta and meta != header:
+        # latin-1 у заголовку - зазвичай налаштування сервера за замовчуванням, <meta> точніший
+        header = None
+    candidates = []
+    for encoding in (header, meta, 'utf-8'):
+        if encoding and encoding not in candidates:
+            candidates.append(encoding)
+    non_ascii = not body.isascii()
+    if non_ascii:
+        # Кириличний текст в однобайтовому кодуванні (cp1251, koi8-r) не буває валідним UTF-8,
+        # тому тіло, яке без помилок декодується як UTF-8, переважає помилково оголошений charset
+        candidates.sort(key=lambda encoding: encoding != 'utf-8')
+    weak = None
+    for encoding in candidates:
+        if non_ascii and encoding in WEAK_ENCODINGS:
+            weak = weak or encoding
+            continue
+        try:
+            return FetchResult(body.decode(encoding), encoding)
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    encoding = detect_encoding(body[:config.get('encoding_detect_bytes', 65536)], weak) or weak or candidates[0]
+    return FetchResult(body.decode(encoding, errors='replace'), encoding)
+
+
+def detect_encoding(prefix: bytes, declared: Optional[str] = None) -> Optional[str]:
+    """
+    Детектор кодування для обмеженого початку документа.
+
+    Споріднені кодування (cp1251, kz1048, ptcp154) для українського тексту дають однаково
+    «чистий» результат, тому серед найкращих варіантів перевага надається `encoding_preferred`.
+
+    :param declared: Оголошене латинське кодування (WEAK_ENCODINGS). Приймається, якщо детектор
+        вважає його майже таким самим імовірним, як найкращий варіант (латинські кодування
+        між собою детектор розрізняє погано); для кирилиці воно серед варіантів не з'являється.
+    """
+    matches = from_bytes(prefix)
+    best = matches.best()
+    if best is None:
+        return None
+    if declared and any(_normalize_encoding(match.encoding) == declared and match.chaos <= best.chaos + 0.1
+                        for match in matches):
+        return declared
+    preferred = [_normalize_encoding(name) for name in config.get('encoding_preferred', [])]
+    for match in matches:
+        if match.chaos > best.chaos:
+            break
+        encoding = _normalize_encoding(match.encoding)
+        if encoding in preferred:
+            return encoding
+    return _normalize_encoding(best.encoding)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Затримка із заголовка Retry-After (секунди або HTTP-дата) або None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class DomainCircuitBreaker:
+    """
+    Вимикає запити до домену на cooldown секунд після failures тимчасових збоїв поспіль.
+
+    Після паузи домен переходить у стан half-open: пропускається лише один пробний запит,
+    решта запитів до домену чекають його результату (отримують відмову). Якщо пробний запит
+    не завершився за cooldown секунд (наприклад, його скасували), пропускається наступний.
+    """
+
+    def __init__(self, failures: Optional[int] = None, cooldown: Optional[float] = None):
+        self.failures = failures if failures is not None else config.get('circuit_breaker_failures', 5)
+        self.cooldown = cooldown if cooldown is not None else config.get('circuit_breaker_cooldown', 60)
+        # домен -> [збоїв поспіль, до якого часу домен вимкнено, до якого часу чекаємо пробний запит]
+        self._state: Dict[str, List[float]] = {}
+
+    def acquire(self, domain: str) -> float:
+        """
+        Дозвіл на запит до домену. Повертає 0, якщо запит можна надсилати (після паузи - це і є
+        пробний запит), інакше - через скільки секунд варто спробувати знову.
+        """
+        state = self._state.get(domain)
+        if state is None or state[0] < self.failures:
+            return 0.0
+        now = time.monotonic()
+        if now < state[1]:
+            return state[1] - now
+        if now < state[2]:
+            return state[2] - now
+        state[2] = now + self.cooldown
+        logging.info(f'Домен {domain}: пробний запит після паузи')
+        return 0.0
+
+    def success(self, domain: str):
+        """Домен відповів - лічильник збоїв скидається."""
+        self._state.pop(domain, None)
+
+    def failure(self, domain: str):
+        """
+        Рахує тимчасовий збій. Після failures збоїв поспіль домен вимикається; збій пробного
+        запиту після паузи вимикає домен знову.
+        """
+        if not self.failures:
+            return
+        state = self._state.setdefault(domain, [0, 0.0, 0.0])
+        state[0] += 1
+        if state[0] >= self.failures:
+            state[1] = time.monotonic() + self.cooldown
+            state[2] = 0.0
+            logging.warning(f'Домен {domain} вимкнено на {self.cooldown} с після {int(state[0])} збоїв поспіль')
+
+
+class HttpFetcher:
+    """Спільна сесія aiohttp з пулом з'єднань на весь час роботи застосунку."""
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.cache: Optional[ResponseCache] = ResponseCache() if config.get('http_cache', 1) else None
+        self.max_body_size = int(config.get('max_body_size_mb', 10) * 1024 * 1024)
+        self.allowed_content_types = {content_type.lower() for content_type in config.get('allowed_content_types', [])}
+        self.retry_attempts = config.get('retry_attempts', 3)
+        self.retry_backoff_base = config.get('retry_backoff_base', 1)
+        self.retry_backoff_max = config.get('retry_backoff_max', 30)
+        self.retry_after_max = config.get('retry_after_max', 60)
+        self.breaker = DomainCircuitBreaker()
+
+    async def start(self):
+        """Створює сесію з налаштованим TCPConnector, якщо її ще немає."""
+        if self.session is not None and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=config.get('connection_limit', 100),
+            limit_per_host=config.get('connection_limit_per_host', 10),
+            keepalive_timeout=config.get('keepalive_timeout', 30),
+            ttl_dns_cache=config.get('dns_cache_ttl', 300),
+        )
+        timeout = aiohttp.ClientTimeout(total=config.get('timeout_time', 15))
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS)
+        logging.info('HTTP-сесію створено')
+
+    async def close(self):
+        """Закриває сесію та всі відкриті з'єднання."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            logging.info('HTTP-сесію закрито')
+        self.session = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Завантажує сторінку і повертає її текст з кодуванням або FetchResult('', '', причина) у разі помилки.
+
+        Свіжий запис кешу повертається без запиту до мережі, прострочений - перевіряється на сервері.
+        Тимчасові збої повторюються до retry_attempts разів; поки домен вимкнено circuit breaker'ом,
+        запити до нього не надсилаються.
+        """
+        if self.session is None or self.session.closed:
+            # Якщо модуль використовується поза FastAPI (скрипти, тести)
+            await self.start()
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        if cached is not None and cached.fresh:
+            logging.info(f'Сторінку взято з кешу: {url}')
+            return FetchResult(cached.text, cached.encoding)
+
+        domain = get_domain(url)
+        attempt = 0
+        while True:
+            retry_in = self.breaker.acquire(domain)
+            if retry_in:
+                logging.info(f'Домен {domain} тимчасово вимкнено, запит пропущено: {url}')
+                return FetchResult('', '', f'Домен тимчасово вимкнено після збоїв поспіль '
+                                           f'(ще {retry_in:.0f} с)', transient=True)
+            result, retry_after = await self._fetch_once(url, cached)
+            if not result.transient:
+                self.breaker.success(domain)
+                return result
+            self.breaker.failure(domain)
+            delay = self._backoff(attempt, retry_after)
+            if attempt >= self.retry_attempts or delay is None:
+                return result
+            attempt += 1
+            logging.warning(f'{result.error}: {url}, повтор {attempt}/{self.retry_attempts} через {delay:.1f} с')
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """
+        Затримка перед повтором: експоненційна з джитером (половина фіксована, половина випадкова),
+        але не менша за Retry-After. None - якщо сервер просить чекати довше за retry_after_max.
+        """
+        delay = min(self.retry_backoff_max, self.retry_backoff_base * 2 ** attempt)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            if retry_after > self.retry_after_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    async def _fetch_once(self, url: str, cached) -> Tuple[FetchResult, Optional[float]]:
+        """Одна спроба запиту. Повертає результат і затримку з Retry-After (якщо сервер її вказав)."""
+        try:
+            headers = cached.revalidation_headers() if cached is not None else None
+            async with self.session.get(url, headers=headers) as response:
+                status_code = response.status
+                logging.info(get_status_description(status_code))
+                if status_code == 304 and cached is not None:
+                    logging.info(f'Сторінка не змінилася, взято з кешу: {url}')
+                    await asyncio.to_thread(self.cache.touch, url)
+                    return FetchResult(cached.text, cached.encoding), None
+                if status_code == 200:
+                    body, error = await self._read_body(response)
+                    if error:
+                        logging.error(f'{error}: {url}')
+                        return FetchResult('', '', error), None
+                    # response.charset - лише заголовок; response.text() запускав би chardet на всьому тілі
+                    result = decode_body(body, response.charset)
+                    if self.cache is not None and 'no-store' not in response.headers.get('Cache-Control', ''):
+                        await asyncio.to_thread(self.cache.put, url, body, result.encoding,
+                                                response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    return result, None
+                logging.error(f"Помилка: не вдалося отримати доступ до сторінки {url} (Статус-код: {status_code})")
+                return (FetchResult('', '', get_status_description(status_code), status_code in RETRY_STATUSES),
+                        retry_after_seconds(response.headers.get('Retry-After')))
+        except Exception as e:
+            logging.error(f"Помилка при обробці URL {url}: {str(e)}")
+            # Домен, якого не існує (DNS), - постійна помилка; обриви з'єднання і таймаути - тимчасові
+            transient = (isinstance(e, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+                         and not isinstance(e, aiohttp.ClientConnectorDNSError))
+            return FetchResult('', '', f'Помилка запиту: {str(e) or e.__class__.__name__}', transient), None
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> Tuple[bytes, str]:
+        """
+        Читає тіло відповіді частинами по CHUNK_SIZE.
+
+        Повертає (тіло, '') або (b'', причина), якщо тип вмісту не дозволений чи тіло більше
+        за max_body_size; в останньому випадку з'єднання закривається, не дочитуючи відповідь.
+        """
+        if self.allowed_content_types and 'Content-Type' in response.headers \
+                and response.content_type.lower() not in self.allowed_content_types:
+            response.close()
+            return b'', f'Недозволений тип вмісту: {response.content_type}'
+        limit = self.max_body_size
+        too_large = f'Розмір відповіді перевищує {limit / 1024 / 1024:g} МБ'
+        if limit and (response.content_length or 0) > limit:
+            response.close()
+            return b'', too_large
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            if limit and size > limit:
+                response.close()
+                return b'', too_large
+            chunks.append(chunk)
+        return b''.join(chunks), ''
+
+
+# Єдиний екземпляр на процес
+http_fetcher = HttpFetcher()
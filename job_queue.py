@@ -0,0 +1,174 @@
+"""
+Цей модуль містить фонову чергу задач парсингу.
+
+## Класи
+
+- **`JobQueue`**: Приймає список URL як задачу і одразу повертає її ID. Задачі виконуються
+  асинхронними воркерами в тому ж процесі, результати додаються в `JobStore` по мірі обробки.
+  Черга та прогрес кожної задачі зберігаються в SQLite, тому після перезапуску сервера
+  незавершені задачі продовжуються з необроблених URL.
+
+## Налаштування
+
+- **Конфігурація**: `job_queue_path`, `job_queue_workers` з `config.yaml`.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from typing import Awaitable, Callable, Iterator, List, Optional
+
+from job_store import JobStore
+from scheduler import BatchScheduler
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+
+class JobQueue:
+    """Персистентна черга задач парсингу з асинхронними воркерами."""
+
+    def __init__(self, store: JobStore, scheduler: BatchScheduler,
+                 handler: Callable[[str, dict], Awaitable[Optional[dict]]],
+                 id_factory: Callable[[int], Iterator[str]],
+                 db_path: Optional[str] = None, workers: Optional[int] = None):
+        """
+        :param store: Сховище результатів.
+        :param scheduler: Планувальник, яким обробляються URL задачі.
+        :param handler: Обробляє один URL з параметрами задачі і повертає рядок результату або None.
+        :param id_factory: Генератор ID рядків (приймає початковий номер).
+        """
+        self.store = store
+        self.scheduler = scheduler
+        self.handler = handler
+        self.id_factory = id_factory
+        self.workers = max(1, workers or config.get('job_queue_workers', 1))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+        self.db_path = db_path or config.get('job_queue_path', 'job_queue.sqlite3')
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Відкриває SQLite черги (файл створюється при старті застосунку, а не при імпорті модуля)."""
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS queue (job_id TEXT PRIMARY KEY, urls TEXT, params TEXT, status TEXT,'
+                ' total INTEGER, done INTEGER, accepted INTEGER, created REAL, started REAL, finished REAL);'
+                'CREATE TABLE IF NOT EXISTS queue_progress (job_id TEXT, position INTEGER,'
+                ' PRIMARY KEY (job_id, position));')
+        return self._db
+
+    async def start(self):
+        """Відкриває SQLite, повертає в чергу незавершені задачі та запускає воркерів."""
+        pending = self._connect().execute(
+            "SELECT job_id FROM queue WHERE status IN ('queued', 'running') ORDER BY created").fetchall()
+        for (job_id,) in pending:
+            logging.info(f'Задачу {job_id} відновлено після перезапуску')
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Зупиняє воркерів. Незавершені задачі продовжаться після наступного старту."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def submit(self, urls: List[str], params: dict) -> str:
+        """Ставить список URL у чергу і повертає ID задачі."""
+        job_id = self.store.create()
+        with self._connect():
+            self._db.execute(
+                'INSERT INTO queue (job_id, urls, params, status, total, done, accepted, created)'
+                " VALUES (?, ?, ?, 'queued', ?, 0, 0, ?)",
+                (job_id, json.dumps(urls, ensure_ascii=False), json.dumps(params), len(urls), time.time()))
+        self._queue.put_nowait(job_id)
+        logging.info(f'Задачу {job_id} поставлено в чергу ({len(urls)} URL)')
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Повертає стан задачі: статус, прогрес і швидкість обробки (URL за секунду)."""
+        row = self._connect().execute(
+            'SELECT status, total, done, accepted, created, started, finished FROM queue WHERE job_id = ?',
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        status, total, done, accepted, created, started, finished = row
+        elapsed = ((finished or time.time()) - started) if started else 0
+        return {
+            'job_id': job_id,
+            'status': status,
+            'total': total,
+            'done': done,
+            'accepted': accepted,
+            'created': created,
+            'started': started,
+            'finished': finished,
+            'throughput': round(done / elapsed, 2) if elapsed > 0 else 0,
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f'Помилка у задачі {job_id}: {str(e)}')
+                with self._db:
+                    self._db.execute("UPDATE queue SET status = 'failed', finished = ? WHERE job_id = ?",
+                                     (time.time(), job_id))
+            finally:
+                self.store.finish(job_id)
+
+    async def _run(self, job_id: str):
+        row = self._db.execute('SELECT urls, params, accepted FROM queue WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None:
+            return
+        urls, params, accepted = json.loads(row[0]), json.loads(row[1]), row[2]
+
+        processed = {position for (position,) in self._db.execute(
+            'SELECT position FROM queue_progress WHERE job_id = ?', (job_id,))}
+        if processed and self.store.get(job_id) is None:
+            # Результати попереднього запуску не збереглися (сховище лише в пам'яті) - починаємо заново
+            processed, accepted = set(), 0
+            with self._db:
+                self._db.execute('DELETE FROM queue_progress WHERE job_id = ?', (job_id,))
+        if self.store.get(job_id) is None:
+            self.store.create(job_id)
+        else:
+            self.store.pin(job_id)
+
+        with self._db:
+            self._db.execute(
+                "UPDATE queue SET status = 'running', started = COALESCE(started, ?), done = ?, accepted = ?"
+                ' WHERE job_id = ?', (time.time(), len(processed), accepted, job_id))
+
+        positions = [position for position in range(len(urls)) if position not in processed]
+        ids = self.id_factory(2 + accepted)
+        done = len(processed)
+        async for index, data in self.scheduler.as_completed(
+                [urls[position] for position in positions], lambda url: self.handler(url, params)):
+            done += 1
+            if data:
+                data['ID'] = next(ids)
+                self.store.append(job_id, [data])
+                accepted += 1
+            with self._db:
+                self._db.execute('INSERT OR IGNORE INTO queue_progress (job_id, position) VALUES (?, ?)',
+                                 (job_id, positions[index]))
+                self._db.execute('UPDATE queue SET done = ?, accepted = ? WHERE job_id = ?', (done, accepted, job_id))
+
+        with self._db:
+            self._db.execute("UPDATE queue SET status = 'done', finished = ? WHERE job_id = ?", (time.time(), job_id))
+        logging.info(f'Задачу {job_id} завершено: {accepted} з {len(urls)} URL')
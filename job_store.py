@@ -0,0 +1,218 @@
+"""
+Цей модуль містить сховище результатів парсингу з розбиттям на задачі (jobs).
+
+## Класи
+
+- **`JobStore`**: Зберігає рядки результатів кожної задачі окремо під її ID.
+  У пам'яті тримає не більше `job_store_max_jobs` задач (LRU) і видаляє задачі,
+  до яких не зверталися довше за `job_store_ttl` секунд. Задачі, в які ще записуються
+  результати (від `create()` до `finish()`), не видаляються. Якщо вказано `job_store_path`,
+  результати також записуються в SQLite на диску і переживають перезапуск сервера.
+
+## Налаштування
+
+- **Конфігурація**: `job_store_max_jobs`, `job_store_ttl`, `job_store_path` з `config.yaml`.
+"""
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+
+def serialize_row(row: dict) -> dict:
+    """Перетворює значення рядка результату на типи, придатні для JSON."""
+    return {key: value if value is None or isinstance(value, (bool, int, float)) else str(value)
+            for key, value in row.items()}
+
+
+class _Job:
+    """Рядки однієї задачі, закешований DataFrame та похідні від нього подання."""
+
+    def __init__(self, created: float):
+        self.created = created
+        self.accessed = created
+        self.rows: List[dict] = []
+        self.frame: Optional[pd.DataFrame] = None
+        self.views: Dict[str, Any] = {}
+
+
+class JobStore:
+    """Сховище результатів парсингу з обмеженням пам'яті за кількістю задач і часом життя."""
+
+    def __init__(self, max_jobs: Optional[int] = None, ttl: Optional[float] = None, db_path: Optional[str] = None):
+        self.max_jobs = max(1, max_jobs or config.get('job_store_max_jobs', 20))
+        self.ttl = ttl if ttl is not None else config.get('job_store_ttl', 3600)
+        self._jobs: 'OrderedDict[str, _Job]' = OrderedDict()
+        self._latest: Optional[str] = None
+        # Задачі, в які ще записуються результати: їх не можна видаляти
+        self._active: Set[str] = set()
+
+        db_path = db_path if db_path is not None else config.get('job_store_path', '')
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, created REAL, accessed REAL);'
+                'CREATE TABLE IF NOT EXISTS job_rows (job_id TEXT, position INTEGER, data TEXT,'
+                ' PRIMARY KEY (job_id, position));')
+            row = self._db.execute('SELECT job_id FROM jobs ORDER BY created DESC LIMIT 1').fetchone()
+            self._latest = row[0] if row else None
+
+    def _expire(self):
+        """Видаляє задачі, до яких давно не зверталися, і зайві задачі понад ліміт (крім активних)."""
+        now = time.time()
+        if self.ttl:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if now - job.accessed > self.ttl and job_id not in self._active]:
+                del self._jobs[job_id]
+            if self._db is not None:
+                with self._db:
+                    expired = [row[0] for row in self._db.execute(
+                        'SELECT job_id FROM jobs WHERE accessed < ?', (now - self.ttl,))
+                        if row[0] not in self._active]
+                    for job_id in expired:
+                        self._db.execute('DELETE FROM job_rows WHERE job_id = ?', (job_id,))
+                        self._db.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+        excess = len(self._jobs) - self.max_jobs
+        if excess > 0:
+            # Найстаріші неактивні задачі; якщо активних більше за ліміт, ліміт тимчасово перевищується
+            for job_id in [job_id for job_id in self._jobs if job_id not in self._active][:excess]:
+                del self._jobs[job_id]
+                logging.info(f'Задачу {job_id} вивантажено з пам\'яті')
+
+    def _load(self, job_id: str) -> Optional[_Job]:
+        """Повертає задачу з пам'яті або з SQLite."""
+        job = self._jobs.get(job_id)
+        if job is None and self._db is not None:
+            row = self._db.execute('SELECT created FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row:
+                job = _Job(row[0])
+                job.rows = [json.loads(data) for (data,) in self._db.execute(
+                    'SELECT data FROM job_rows WHERE job_id = ? ORDER BY position', (job_id,))]
+                self._jobs[job_id] = job
+        if job is not None:
+            job.accessed = time.time()
+            self._jobs.move_to_end(job_id)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('UPDATE jobs SET accessed = ? WHERE job_id = ?', (job.accessed, job_id))
+        return job
+
+    def create(self, job_id: Optional[str] = None) -> str:
+        """
+        Створює нову порожню задачу і повертає її ID.
+
+        Задача залишається активною (не видаляється за лімітом чи TTL), доки не викликано `finish()`.
+
+        :param job_id: ID задачі (наприклад, при відновленні задачі з черги). Якщо не вказано - генерується.
+        """
+        self._expire()
+        job_id = job_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        self._jobs[job_id] = _Job(now)
+        self._active.add(job_id)
+        self._latest = job_id
+        if self._db is not None:
+            with self._db:
+                self._db.execute('DELETE FROM job_rows WHERE job_id = ?', (job_id,))
+                self._db.execute('INSERT OR REPLACE INTO jobs (job_id, created, accessed) VALUES (?, ?, ?)',
+                                 (job_id, now, now))
+        self._expire()
+        return job_id
+
+    def append(self, job_id: str, rows: List[dict]):
+        """Додає рядки результатів до задачі."""
+        job = self._load(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    'INSERT INTO job_rows (job_id, position, data) VALUES (?, ?, ?)',
+                    [(job_id, len(job.rows) + offset, json.dumps(serialize_row(row), ensure_ascii=False))
+                     for offset, row in enumerate(rows)])
+        job.rows.extend(rows)
+        job.frame = None
+        job.views.clear()
+
+    def pin(self, job_id: str):
+        """Позначає наявну задачу активною (наприклад, відновлену з SQLite задачу черги)."""
+        self._active.add(job_id)
+
+    def finish(self, job_id: str):
+        """Запис у задачу завершено - тепер її можна видаляти за лімітом і TTL."""
+        self._active.discard(job_id)
+        self._expire()
+
+    @property
+    def latest_job_id(self) -> Optional[str]:
+        """ID останньої створеної задачі."""
+        return self._latest
+
+    def get(self, job_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Повертає результати задачі як DataFrame.
+
+        Якщо job_id не вказано, повертає результати останньої задачі.
+        """
+        job_id = job_id or self._latest
+        if not job_id:
+            return None
+        job = self._load(job_id)
+        if job is None:
+            return None
+        if job.frame is None:
+            job.frame = pd.DataFrame(job.rows)
+        return job.frame
+
+    def view(self, job_id: Optional[str], name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        Повертає похідне подання результатів задачі (наприклад, очищену таблицю або готовий HTML),
+        обчислюючи його лише один раз. Кеш скидається, коли до задачі додаються нові рядки.
+
+        :param name: Назва подання (ключ кешу).
+        :param build: Функція, яка будує подання з DataFrame задачі.
+        """
+        job_id = job_id or self._latest
+        frame = self.get(job_id) if job_id else None
+        if frame is None:
+            return None
+        job = self._jobs[job_id]
+        if name not in job.views:
+            job.views[name] = build(frame)
+        return job.views[name]
+
+    def records(self, job_id: Optional[str] = None) -> Optional[List[dict]]:
+        """
+        Повертає рядки задачі як є, без побудови DataFrame (для потокового експорту).
+
+        Якщо job_id не вказано, повертає рядки останньої задачі.
+        """
+        job_id = job_id or self._latest
+        job = self._load(job_id) if job_id else None
+        return list(job.rows) if job is not None else None
+
+    def rows(self, job_id: str, start: int = 0) -> Optional[List[dict]]:
+        """Повертає рядки задачі, починаючи з позиції start (для поступового отримання результатів)."""
+        job = self._load(job_id)
+        if job is None:
+            return None
+        return [serialize_row(row) for row in job.rows[start:]]
+
+    def close(self):
+        """Закриває з'єднання з SQLite."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
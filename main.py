@@ -1,5 +1,6 @@
 import os
 import glob
+import multiprocessing
 import uvicorn
 from app import app
 from utils import load_config
@@ -38,4 +39,6 @@ def main():
     input("Натисніть Enter для завершення...")
 
 if __name__ == "__main__":
+    # Потрібно для пулу процесів у зібраному PyInstaller .exe
+    multiprocessing.freeze_support()
     main()
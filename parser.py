@@ -1,4 +1,6 @@
 import concurrent.futures
+import multiprocessing
+import os
 import re
 import time
 from selenium.webdriver.support import expected_conditions as EC
@@ -6,22 +8,15 @@ from selenium.webdriver.common.by import By
 from typing import List
 import logging
 from urllib.parse import urljoin
-import aiohttp
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.wait import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
 import asyncio
 from readability import Document
-from data_processing import remove_unwanted_tags, should_ignore, replace_img_tags, clean_html_tags, remove_html_attributes
-from utils import get_status_description, load_config
-from config_chrome_options import chrome_options
-
-# Ліміт для кількості одночасних екземплярів браузера
-MAX_BROWSER_INSTANCES = 2
-browser_semaphore = asyncio.Semaphore(MAX_BROWSER_INSTANCES)
+from data_processing import remove_unwanted_tags, should_ignore, replace_img_tags, clean_html_tags, remove_html_attributes, clean_html_lxml, html_plain_text
+from utils import load_config
+from browser_pool import browser_pool
+from fetcher import FetchResult, http_fetcher
+from extraction_cache import ExtractionCache
 
 # Налаштування логування
 logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
@@ -30,55 +25,89 @@ status_description = 'Помилка при обробці'
 # Завантаження конфігурації
 config = load_config('config.yaml')
 
-async def Https_Parser(url: str) -> str:
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+# Окремий пул потоків для Selenium, щоб синхронний браузер не блокував цикл подій
+selenium_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=config.get('selenium_workers', config.get('browser_pool_size', 2)),
+    thread_name_prefix='selenium')
 
-    }
-    try:
-        timeout_time = config.get('timeout_time', 15)
-        timeout = aiohttp.ClientTimeout(total=timeout_time)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as response:
-                status_code = response.status
-                status_description = get_status_description(response.status)
-                logging.info(status_description)
-                if status_code == 200:
-                    response_text = await response.text()
-                    return response_text
-                else:
-                    logging.error(f"Помилка: не вдалося отримати доступ до сторінки {url} (Статус-код: {status_code})")
-                    return ''
-    except Exception as e:
-        logging.error(f"Помилка при обробці URL {url}: {str(e)}")
-        return ''
+# Кеш готових результатів аналізу (ключ - HTML сторінки та налаштування очищення)
+extraction_cache = ExtractionCache() if config.get('extraction_cache', 1) else None
 
-def Selenium_Parser(url: str) -> str:
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options())
-    try:
-        driver.get(url)
-        WebDriverWait(driver, 3).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+# Пул процесів для CPU-частини аналізу HTML (створюється при старті застосунку)
+process_executor = None
 
-        scroll_duration = 6  # Тривалість прокрутки в секундах
-        scroll_speed = 180  # Швидкість прокрутки (в пікселях за один крок)
-        start_time = time.time()
+def start_process_pool():
+    """
+    Створює пул процесів для analyze_page.
+
+    Процеси запускаються через spawn, а не fork: fork посеред працюючого циклу подій
+    з потоками aiohttp, to_thread і Selenium може успадкувати заблоковані м'ютекси.
+    Так само пул працює на Windows і в зібраному PyInstaller .exe.
+    """
+    global process_executor
+    if process_executor is None:
+        workers = config.get('process_workers', 0) or os.cpu_count()
+        process_executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        logging.info(f'Пул процесів для аналізу HTML: {workers}')
+
+def stop_process_pool():
+    """Зупиняє пул процесів."""
+    global process_executor
+    if process_executor is not None:
+        process_executor.shutdown(wait=False, cancel_futures=True)
+        process_executor = None
+
+async def Https_Parser(url: str) -> FetchResult:
+    return await http_fetcher.fetch(url)
+
+def scroll_page(driver) -> None:
+    """
+    Прокручує сторінку, щоб підвантажився лінивий контент.
 
+    У режимі `fixed` прокрутка триває рівно `scroll_max_duration` секунд.
+    У режимі `adaptive` сторінка прокручується до низу і прокрутка зупиняється, щойно
+    висота документа і кількість вузлів DOM не змінюються протягом `scroll_quiet_period`.
+    """
+    scroll_duration = config.get('scroll_max_duration', 6)  # Максимальна тривалість прокрутки в секундах
+    start_time = time.time()
+
+    if config.get('scroll_mode', 'adaptive') == 'fixed':
+        scroll_speed = 180  # Швидкість прокрутки (в пікселях за один крок)
         while time.time() - start_time < scroll_duration:
             driver.execute_script(f"window.scrollBy(0, {scroll_speed});")
             time.sleep(0.05)  # Інтервал між прокрутками
-
         time.sleep(1)
-        page_source = driver.page_source
+        return
+
+    quiet_period = config.get('scroll_quiet_period', 0.5)
+    last_state = None
+    stable_since = time.time()
+    while time.time() - start_time < scroll_duration:
+        at_bottom, height, nodes = driver.execute_script(
+            "window.scrollBy(0, window.innerHeight);"
+            "return [window.innerHeight + window.pageYOffset >= document.body.scrollHeight - 2,"
+            " document.body.scrollHeight, document.getElementsByTagName('*').length];")
+        now = time.time()
+        if (height, nodes) != last_state:
+            last_state = (height, nodes)
+            stable_since = now
+        elif at_bottom and now - stable_since >= quiet_period:
+            break
+        time.sleep(0.05)  # Інтервал між прокрутками
+
+def Selenium_Parser(url: str) -> str:
+    start_time = time.time()
+    try:
+        with browser_pool.driver() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 3).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+            scroll_page(driver)
+            page_source = driver.page_source
     except Exception as e:
         logging.error(f'Помилка у Selenium: {str(e)}')
         page_source = ''
-    finally:
-        try:
-            driver.close()
-            driver.quit()
-        except Exception as e:
-            logging.error(f'Помилка при закритті драйвера Selenium: {str(e)}')
-            page_source = ''
+    logging.info(f'Selenium: {url} оброблено за {time.time() - start_time:.2f} с')
     return page_source
 
 def process_url_with_selenium(url: str) -> str:
@@ -89,30 +118,98 @@ def process_url_with_selenium(url: str) -> str:
         return ''
 
 async def extract_content(url: str, ignore_list: List[str], code_v: str='0', parser_type='https'):
+    # Кодування відоме лише для https: Selenium повертає вже декодований браузером DOM
     if parser_type == 'https':
-        page_source = await Https_Parser(url)
+        fetched = await Https_Parser(url)
     elif parser_type == 'Selenium':
-        page_source = process_url_with_selenium(url)
+        loop = asyncio.get_running_loop()
+        fetched = FetchResult(await loop.run_in_executor(selenium_executor, process_url_with_selenium, url), '')
     else:
         logging.error(f'Невірний тип парсера: {parser_type}')
-        page_source = ''
-    return await analysis_html(url, page_source, code_v, ignore_list)
+        fetched = FetchResult('', '', f'Невірний тип парсера: {parser_type}')
+    data = await analysis_html(url, fetched.text, code_v, ignore_list)
+    # 'Повторити пізніше' - сторінку не отримано через тимчасовий збій (таймаут, 429/5xx, вимкнений домен)
+    data = {**data, 'Кодування': fetched.encoding, 'Повторити пізніше': 'ТАК' if fetched.transient else 'НІ'}
+    if fetched.error:
+        # Причина, з якої сторінку не отримано (статус-код, ліміт розміру, тип вмісту)
+        data['Код відповіді'] = fetched.error
+    return data
 
 
 
 async def analysis_html(url: str, page_source: str, code_v: str, ignore_list: List[str]) -> dict:
+    """
+    Аналізує HTML сторінки в окремому процесі (якщо пул процесів запущений).
+
+    Через межу процесу передаються лише рядки: сирий HTML туди і словник з HTML-рядком назад.
+    `Content` у результаті - готовий HTML-рядок, який далі не потребує повторної серіалізації.
+    Якщо ця сторінка вже аналізувалася з тими самими налаштуваннями, результат береться з кешу.
+    """
+    cache_key = None
+    if extraction_cache is not None and page_source:
+        cache_key = extraction_cache.key(url, page_source, code_v, ignore_list)
+        data = await asyncio.to_thread(extraction_cache.get, cache_key)
+        if data is not None:
+            logging.info(f'Результат аналізу взято з кешу: {url}')
+            return data
+
+    if process_executor is None:
+        data = analyze_page(url, page_source, code_v, ignore_list)
+    else:
+        loop = asyncio.get_running_loop()
+        executor = process_executor
+        try:
+            data = await loop.run_in_executor(executor, analyze_page, url, page_source, code_v, ignore_list)
+        except concurrent.futures.BrokenExecutor:
+            # Пул перезапускає лише перша задача, яка помітила збій; решта просто повторюють спробу
+            if process_executor is executor:
+                logging.error('Пул процесів аварійно завершився, перезапуск')
+                stop_process_pool()
+                start_process_pool()
+            try:
+                data = await loop.run_in_executor(process_executor, analyze_page, url, page_source, code_v, ignore_list)
+            except concurrent.futures.BrokenExecutor:
+                logging.error(f'Пул процесів знову аварійно завершився на {url}')
+                data = failed_result(url)
+    if cache_key is not None and data['Status Parsing'] == 'ТАК':
+        await asyncio.to_thread(extraction_cache.put, cache_key, data)
+    return data
+
+def text_columns(plain_text: str) -> dict:
+    """
+    Колонки результату, пов'язані з текстом статті: кількість символів (для min_chars/max_chars)
+    і сам текст, якщо увімкнено store_plain_text.
+    """
+    columns = {}
+    if config.get('store_plain_text', 0):
+        columns['Text'] = plain_text
+    columns['Кількість символів'] = len(plain_text)
+    return columns
+
+def failed_result(url: str) -> dict:
+    """Результат для сторінки, яку не вдалося обробити."""
+    return {
+        'Status Parsing': 'НІ',
+        'ID': '1.2.',
+        'Title': 'No Title',
+        'Content': '<p>None</p>',
+        **text_columns('None'),
+        'URL': url,
+        'Код відповіді': status_description,
+        'Image Url_original': '',
+        'Image now Url': ''
+    }
+
+def analyze_page(url: str, page_source: str, code_v: str, ignore_list: List[str]) -> dict:
+    """
+    CPU-частина аналізу сторінки: парсинг, вибір контенту та очищення.
+
+    Функція не робить I/O і повертає лише рядки та числа, тому може виконуватись у ProcessPoolExecutor.
+    Текст статті та кількість його символів рахуються тут один раз.
+    """
     if page_source == '':
         logging.error(f'Неможливо обробити порожній контент для URL: {url}')
-        return {
-            'Status Parsing': 'НІ',
-            'ID': '1.2.',
-            'Title': 'No Title',
-            'Content': BeautifulSoup('<p>None</p>', 'html.parser'),
-            'URL': url,
-            'Код відповіді': status_description,
-            'Image Url_original': '',
-            'Image now Url': ''
-        }
+        return failed_result(url)
     try:
         soup = BeautifulSoup(page_source, 'html.parser')
         title_tag = soup.find('h1')
@@ -124,7 +221,7 @@ async def analysis_html(url: str, page_source: str, code_v: str, ignore_list: Li
             if title_tag:
                 # Обходимо всі наступні елементи на тому ж рівні вкладеності дей h1
                 content = parse_sibling_elements_after_h1(title_tag, ignore_list)
-                content_html = f'{title_html}{''.join(content)}'
+                content_html = title_html + ''.join(content)
         elif code_v == '1':
             if title_tag:
                 # Знайти всі елементи після h1
@@ -132,26 +229,35 @@ async def analysis_html(url: str, page_source: str, code_v: str, ignore_list: Li
                 content_html = f'{title_html}{content}'
         elif code_v == '2':
             content = parse_readability(soup, ignore_list)
-            content_html = f'{title_html}{''.join(content)}'
-
-        content_html = BeautifulSoup(content_html, 'html.parser')
-        # Очищення та обробка HTML контенту
-
-        content_html = clean_html_tags(content_html)
-        content_html = remove_unwanted_tags(content_html)
-        content_html = remove_html_attributes(content_html)
-
-        images = content_html.find_all('img')
-        image_urls_original = [urljoin(url, img.get('src')) for img in images if img.get('src')]
-
-        images = content_html.find_all('img')
-        content_html = replace_img_tags(content_html, url)
-        image_urls = [urljoin(url, img.get('src')) for img in images if img.get('src')]
+            content_html = title_html + ''.join(content)
+
+        if config.get('engine', 'bs4') == 'lxml':
+            # Очищення та обробка HTML контенту за один обхід дерева lxml
+            content_html, image_urls_original, image_urls = clean_html_lxml(content_html, url)
+            plain_text = html_plain_text(content_html)
+        else:
+            # Сторінка вже розібрана один раз вище; тут розбирається лише вирізаний фрагмент статті
+            content_html = BeautifulSoup(content_html, 'html.parser')
+            # Очищення та обробка HTML контенту
+
+            content_html = clean_html_tags(content_html)
+            content_html = remove_unwanted_tags(content_html)
+            content_html = remove_html_attributes(content_html)
+
+            images = content_html.find_all('img')
+            image_urls_original = [urljoin(url, img.get('src')) for img in images if img.get('src')]
+
+            # replace_img_tags змінює ті самі теги, тому повторний пошук не потрібен
+            content_html = replace_img_tags(content_html, url)
+            image_urls = [urljoin(url, img.get('src')) for img in images if img.get('src')]
+            plain_text = ' '.join(content_html.stripped_strings)
+            content_html = str(content_html)
         return {
             'Status Parsing': 'ТАК',
             'ID': '1.2.',
             'Title': title_text,
             'Content': content_html,
+            **text_columns(plain_text),
             'URL': url,
             'Код відповіді': status_description,
             'Image Url_original': ' \n'.join(image_urls_original),
@@ -159,16 +265,7 @@ async def analysis_html(url: str, page_source: str, code_v: str, ignore_list: Li
         }
     except Exception as e:
         logging.error(f"Помилка при обробці URL {url}: {str(e)}")
-        return {
-            'Status Parsing': 'НІ',
-            'ID': '1.2.',
-            'Title': 'No Title',
-            'Content': BeautifulSoup('<p>None</p>', 'html.parser'),
-            'URL': url,
-            'Код відповіді': status_description,
-            'Image Url_original': '',
-            'Image now Url': ''
-        }
+        return failed_result(url)
 
 def parse_sibling_elements_after_h1(title_tag: BeautifulSoup, ignore_list: List[str]):
     """
@@ -239,25 +336,23 @@ def parse_readability(html: BeautifulSoup, ignore_list: List[str]):
     # Використовуємо BeautifulSoup для парсингу очищеного HTML
     soup = BeautifulSoup(article_html, 'html.parser')
 
-    # Знаходимо всі зображення в оригінальному HTML
-    original_soup = BeautifulSoup(html_text, 'html.parser')
-    images = original_soup.find_all('img')
+    # Зображення шукаємо у вже розібраному оригінальному HTML (без повторного парсингу)
+    images = html.find_all('img')
 
     # Додаємо зображення до основного контенту
     content = []
-    skip = False
     for tag in soup.find_all(True):  # True знайде всі теги
         tag_text = tag.get_text(strip=True)
         if any(word in tag_text.lower() for word in ignore_list):
-            skip = True
-        if not skip:
-            content.append(tag.prettify())
+            # Після стоп-слова нічого не зберігаємо
+            break
+        content.append(tag.prettify())
 
     # Додаємо зображення в кінець очищеного контенту
+    image_parents = {'p', 'div', 'article', 'section', 'figure', 'header', 'aside'}
     for img in images:
-        if img.parent in original_soup.find_all(['p', 'div', 'article', 'section', 'figure', 'header', 'aside']):
-            img_tag = BeautifulSoup(str(img), 'html.parser')
-            content.append(img_tag.prettify())
+        if img.parent is not None and img.parent.name in image_parents:
+            content.append(img.prettify())
 
     # Форматування фінального HTML
     final_html = ''.join(content)
@@ -0,0 +1,136 @@
+"""
+Цей модуль містить дисковий кеш HTTP-відповідей для `HttpFetcher`.
+
+## Класи
+
+- **`ResponseCache`**: Зберігає тіла сторінок (стиснені zlib) разом з ETag, Last-Modified
+  та кодуванням у SQLite, ключ - URL. Свіжі записи (молодші за `http_cache_ttl`) віддаються
+  без запиту до мережі, прострочені - перевіряються умовним запитом
+  (`If-None-Match` / `If-Modified-Since`). Якщо загальний розмір кешу перевищує
+  `http_cache_max_size_mb`, видаляються записи, до яких давно не зверталися (LRU).
+
+## Налаштування
+
+- **Конфігурація**: `http_cache`, `http_cache_path`, `http_cache_ttl`, `http_cache_max_size_mb` з `config.yaml`.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+
+class CachedResponse(NamedTuple):
+    """Запис кешу для одного URL."""
+    body: bytes
+    encoding: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors='replace')
+
+    def revalidation_headers(self) -> dict:
+        """Заголовки умовного запиту для перевірки простроченого запису."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Кеш HTTP-відповідей у SQLite з TTL, перевіркою через ETag/Last-Modified і обмеженням розміру."""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, max_size_mb: Optional[float] = None):
+        self.path = path or config.get('http_cache_path', 'cache/http_cache.sqlite3')
+        self.ttl = ttl if ttl is not None else config.get('http_cache_ttl', 3600)
+        self.max_size = int((max_size_mb if max_size_mb is not None
+                             else config.get('http_cache_max_size_mb', 200)) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, body BLOB, size INTEGER,'
+                ' encoding TEXT, etag TEXT, last_modified TEXT, stored_at REAL, accessed REAL);'
+                'CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);')
+        return self._db
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Повертає запис кешу для URL або None, якщо його немає."""
+        with self._lock:
+            db = self._connect()
+            row = db.execute('SELECT body, encoding, etag, last_modified, stored_at FROM responses WHERE url = ?',
+                             (url,)).fetchone()
+            if row is None:
+                return None
+            body, encoding, etag, last_modified, stored_at = row
+            now = time.time()
+            with db:
+                db.execute('UPDATE responses SET accessed = ? WHERE url = ?', (now, url))
+        fresh = not self.ttl or now - stored_at < self.ttl
+        return CachedResponse(zlib.decompress(body), encoding, etag, last_modified, fresh)
+
+    def put(self, url: str, body: bytes, encoding: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        """Зберігає відповідь у кеш і видаляє старі записи, якщо кеш завеликий."""
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute('INSERT OR REPLACE INTO responses'
+                           ' (url, body, size, encoding, etag, last_modified, stored_at, accessed)'
+                           ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           (url, compressed, len(compressed), encoding, etag, last_modified, now, now))
+            self._evict(db)
+
+    def touch(self, url: str):
+        """Продовжує свіжість запису після відповіді 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute('UPDATE responses SET stored_at = ?, accessed = ? WHERE url = ?', (now, now, url))
+
+    def _evict(self, db: sqlite3.Connection):
+        """Видаляє записи, до яких давно не зверталися, поки розмір кешу більший за ліміт."""
+        if not self.max_size:
+            return
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_size:
+            return
+        evicted = []
+        for url, size in db.execute('SELECT url, size FROM responses ORDER BY accessed'):
+            if total <= self.max_size:
+                break
+            evicted.append((url,))
+            total -= size
+        with db:
+            db.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        logging.info(f'З кешу HTTP видалено {len(evicted)} записів')
+
+    def close(self):
+        """Закриває з'єднання з SQLite."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
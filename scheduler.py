@@ -0,0 +1,163 @@
+"""
+Цей модуль містить планувальник пакетної обробки URL з обмеженням паралельності.
+
+## Класи
+
+- **`BatchScheduler`**: Ставить URL у чергу і віддає їх пулу асинхронних воркерів.
+  Обмежує загальну кількість одночасних задач, кількість одночасних задач на один домен
+  та мінімальну затримку між запитами до одного домену. Стан домену (семафор і час наступного
+  запиту) видаляється, щойно до домену немає активних запитів і затримка минула.
+
+## Налаштування
+
+- **Конфігурація**: `max_concurrency`, `per_domain_concurrency`, `per_domain_delay` з `config.yaml`.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils import load_config
+
+logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+config = load_config('config.yaml')
+
+
+def get_domain(url: str) -> str:
+    """Повертає домен URL у нижньому регістрі."""
+    try:
+        return urlsplit(url).netloc.lower() or url
+    except ValueError:
+        return url
+
+
+class BatchScheduler:
+    """Пул воркерів з глобальним і доменним обмеженням паралельності."""
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_domain_concurrency: Optional[int] = None,
+                 per_domain_delay: Optional[float] = None):
+        self.max_concurrency = max(1, max_concurrency or config.get('max_concurrency', 20))
+        self.per_domain_concurrency = max(1, per_domain_concurrency or config.get('per_domain_concurrency', 2))
+        self.per_domain_delay = per_domain_delay if per_domain_delay is not None else config.get('per_domain_delay', 0.5)
+
+        # Стан спільний для всіх пакетів, щоб паралельні запити теж не перевантажували домен
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._domain_next_start: Dict[str, float] = {}
+        # Скільки запитів до домену зараз виконуються або чекають на семафор
+        self._domain_users: Dict[str, int] = {}
+        self._domain_lock = asyncio.Lock()
+
+    def _domain_semaphore(self, domain: str) -> asyncio.Semaphore:
+        if domain not in self._domain_semaphores:
+            self._domain_semaphores[domain] = asyncio.Semaphore(self.per_domain_concurrency)
+        return self._domain_semaphores[domain]
+
+    @asynccontextmanager
+    async def _domain_slot(self, domain: str):
+        """Місце в доменному семафорі з дотриманням затримки між запитами до домену."""
+        self._domain_users[domain] = self._domain_users.get(domain, 0) + 1
+        try:
+            async with self._domain_semaphore(domain):
+                await self._wait_politeness_delay(domain)
+                yield
+        finally:
+            self._domain_users[domain] -= 1
+            self._prune()
+
+    def _prune(self):
+        """
+        Видаляє стан доменів, до яких немає активних запитів і для яких затримка вже минула,
+        щоб словники не росли з кожним новим доменом за весь час роботи сервера.
+        """
+        now = time.monotonic()
+        for domain in [domain for domain, users in self._domain_users.items()
+                       if not users and self._domain_next_start.get(domain, now) <= now]:
+            del self._domain_users[domain]
+            self._domain_semaphores.pop(domain, None)
+            self._domain_next_start.pop(domain, None)
+
+    async def _wait_politeness_delay(self, domain: str):
+        """Чекає, поки мине мінімальна затримка з моменту попереднього запиту до домену."""
+        if not self.per_domain_delay:
+            return
+        async with self._domain_lock:
+            now = time.monotonic()
+            start_at = max(now, self._domain_next_start.get(domain, now))
+            self._domain_next_start[domain] = start_at + self.per_domain_delay
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    @staticmethod
+    def _interleave_by_domain(urls: List[str]) -> List[Tuple[int, str]]:
+        """Чергує URL різних доменів, щоб воркери не стояли в черзі до одного домену."""
+        groups: Dict[str, List[Tuple[int, str]]] = OrderedDict()
+        for index, url in enumerate(urls):
+            groups.setdefault(get_domain(url), []).append((index, url))
+        ordered = []
+        queues = [list(reversed(group)) for group in groups.values()]
+        while queues:
+            for group in queues:
+                ordered.append(group.pop())
+            queues = [group for group in queues if group]
+        return ordered
+
+    async def as_completed(self, urls: List[str],
+                           worker: Callable[[str], Awaitable[Any]]) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Обробляє URL воркером і віддає пари (індекс URL, результат) у порядку завершення.
+
+        :param urls: Список URL.
+        :param worker: Асинхронна функція, яка обробляє один URL.
+        """
+        if not urls:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self._interleave_by_domain(urls):
+            queue.put_nowait(item)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def run_worker():
+            while True:
+                try:
+                    index, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                domain = get_domain(url)
+                try:
+                    async with self._domain_slot(domain):
+                        async with self._global_semaphore:
+                            result = await worker(url)
+                except asyncio.CancelledError:
+                    # Скасовано сам воркер (as_completed завершується) - виходимо
+                    if asyncio.current_task().cancelling():
+                        raise
+                    # Скасовано лише future у виконавці (напр. shutdown з cancel_futures=True):
+                    # рахуємо URL невдалим, щоб as_completed не чекав на нього вічно
+                    logging.error(f'Обробку URL {url} скасовано')
+                    result = None
+                except Exception as e:
+                    logging.error(f'Помилка у воркері для URL {url}: {str(e)}')
+                    result = None
+                await results.put((index, result))
+
+        workers = [asyncio.create_task(run_worker()) for _ in range(min(self.max_concurrency, len(urls)))]
+        try:
+            for _ in range(len(urls)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def run(self, urls: List[str], worker: Callable[[str], Awaitable[Any]]) -> List[Any]:
+        """Обробляє всі URL і повертає результати в порядку вхідного списку."""
+        results: List[Any] = [None] * len(urls)
+        async for index, result in self.as_completed(urls, worker):
+            results[index] = result
+        return results
@@ -0,0 +1,53 @@
+"""Порівняння швидкості очищення HTML: рушій bs4 проти рушія lxml (config.yaml -> engine).
+
+Запуск з кореня проєкту:
+    python tests/bench_cleaning.py [шлях до html] [кількість повторів]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from data_processing import (clean_html_tags, remove_unwanted_tags, remove_html_attributes,
+                             replace_img_tags, clean_html_lxml)
+
+BASE_URL = 'https://example.com/articles/page.html'
+
+
+def bs4_pipeline(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+    soup = clean_html_tags(soup)
+    soup = remove_unwanted_tags(soup)
+    soup = remove_html_attributes(soup)
+    images = soup.find_all('img')
+    [img.get('src') for img in images]
+    soup = replace_img_tags(soup, BASE_URL)
+    return str(soup)
+
+
+def lxml_pipeline(html: str) -> str:
+    cleaned, _, _ = clean_html_lxml(html, BASE_URL)
+    return cleaned
+
+
+def bench(func, html: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'test.html')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with open(path, 'r', encoding='utf-8') as file:
+        html = file.read()
+
+    bs4_ms = bench(bs4_pipeline, html, repeat)
+    lxml_ms = bench(lxml_pipeline, html, repeat)
+    print(f'Сторінка: {path} ({len(html)} символів), повторів: {repeat}')
+    print(f'bs4:  {bs4_ms:.1f} мс/сторінка')
+    print(f'lxml: {lxml_ms:.1f} мс/сторінка')
+    print(f'Прискорення: x{bs4_ms / lxml_ms:.1f}')
@@ -0,0 +1,82 @@
+"""Швидкість і пам'ять html_to_xml на великих документах: ітеративний потоковий конвертер
+проти попереднього рекурсивного (ElementTree).
+
+Запуск з кореня проєкту:
+    python tests/bench_html_to_xml.py [розміри в МБ через кому]
+"""
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from utils import iter_html_to_xml
+
+PARAGRAPH = ('<p>Текст абзацу з <b>виділенням</b>, <a href="https://example.com/page">посиланням</a> '
+             'і хвостом після тегу. <img src="https://example.com/img.png" alt="img"></p>\n')
+
+
+def make_document(size_mb: float) -> str:
+    count = int(size_mb * 1024 * 1024 / len(PARAGRAPH.encode('utf-8')))
+    return '<h1>Заголовок</h1>' + PARAGRAPH * count
+
+
+def make_deep_document(depth: int) -> str:
+    return '<div>' * depth + 'глибокий текст' + '</div>' * depth
+
+
+def legacy_html_to_xml(html_content: BeautifulSoup) -> str:
+    """Попередня реалізація: рекурсія + ElementTree, текст зберігається лише для element.string."""
+    try:
+        root = ET.Element("root")
+
+        def parse_element(element, parent):
+            tag = ET.SubElement(parent, element.name)
+            for attr, value in element.attrs.items():
+                tag.set(attr, value)
+            if element.string:
+                tag.text = element.string.strip()
+            for child in element.children:
+                if isinstance(child, str):
+                    continue
+                parse_element(child, tag)
+
+        parse_element(html_content, root)
+        return ET.tostring(root, encoding='unicode')
+    except Exception:
+        return f"<root><![CDATA[{html_content}]]></root>"
+
+
+def streaming_html_to_xml(html_content: BeautifulSoup) -> int:
+    """Новий конвертер; частини не накопичуються, як під час запису в ZIP."""
+    return sum(len(chunk) for chunk in iter_html_to_xml(html_content))
+
+
+def measure(func, soup):
+    start = time.perf_counter()
+    func(soup)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(soup)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+if __name__ == '__main__':
+    sizes = [float(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1, 5, 10]
+    print(f'{"документ":>14} | {"рекурсивний":>22} | {"потоковий":>22}')
+    for size in sizes:
+        soup = BeautifulSoup(make_document(size), 'html.parser')
+        legacy_time, legacy_peak = measure(legacy_html_to_xml, soup)
+        new_time, new_peak = measure(streaming_html_to_xml, soup)
+        print(f'{size:>11.0f} МБ | {legacy_time:>7.2f} с {legacy_peak:>8.1f} МБ | {new_time:>7.2f} с {new_peak:>8.1f} МБ')
+
+    soup = BeautifulSoup(make_deep_document(5000), 'html.parser')
+    legacy = legacy_html_to_xml(soup)
+    new = ''.join(iter_html_to_xml(soup))
+    print(f'Глибина 5000: рекурсивний - {"CDATA (RecursionError)" if "CDATA" in legacy else "XML"}, '
+          f'потоковий - {"XML" if "глибокий текст" in new and "CDATA" not in new else "помилка"}')
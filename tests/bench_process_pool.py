@@ -0,0 +1,48 @@
+"""Масштабування analyze_page за кількістю процесів у пулі (ProcessPoolExecutor, spawn).
+
+Запуск з кореня проєкту:
+    python tests/bench_process_pool.py [шлях до html] [кількість сторінок]
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parser import analyze_page
+
+BASE_URL = 'https://example.com/articles/page.html'
+
+
+def run(html: str, pages: int, workers: int) -> float:
+    """Сторінок за секунду; пул прогрівається до заміру, щоб не рахувати запуск процесів."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context('spawn')) as executor:
+        list(executor.map(analyze_page, [BASE_URL] * workers, [html] * workers, ['0'] * workers, [[]] * workers))
+        start = time.perf_counter()
+        list(executor.map(analyze_page, [f'{BASE_URL}?{i}' for i in range(pages)], [html] * pages,
+                          ['0'] * pages, [[]] * pages, chunksize=1))
+        return pages / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'test.html')
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with open(path, encoding='utf-8') as file:
+        html = file.read()
+
+    start = time.perf_counter()
+    for _ in range(20):
+        analyze_page(BASE_URL, html, '0', [])
+    print(f'Без пулу: {20 / (time.perf_counter() - start):.1f} стор/с')
+
+    baseline = None
+    workers = 1
+    while workers <= os.cpu_count():
+        rate = run(html, pages, workers)
+        baseline = baseline or rate
+        print(f'{workers:>2} процесів: {rate:7.1f} стор/с, прискорення x{rate / baseline:.2f}')
+        workers *= 2
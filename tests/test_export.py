@@ -0,0 +1,25 @@
+"""Тести потокового експорту результатів у data_processing."""
+import io
+
+from openpyxl import load_workbook
+
+from data_processing import iter_csv, iter_xlsx
+
+ROWS = [
+    {'Status Parsing': 'ТАК', 'Title': 'Заголовок', 'Content': '<p>a\x0bb\x00c\x1f</p>', 'Кількість символів': 3},
+    {'Status Parsing': 'ТАК', 'Title': 'Другий\nрядок', 'Content': '<p>ok</p>', 'Кількість символів': 2},
+]
+
+
+def test_xlsx_strips_illegal_characters():
+    for cleaned in (False, True):
+        sheet = load_workbook(io.BytesIO(b''.join(iter_xlsx(ROWS, cleaned)))).active
+        values = list(sheet.values)
+        assert values[0] == ('Status Parsing', 'Title', 'Content', 'Кількість символів')
+        assert values[1][2] == '<p>abc</p>'
+        assert values[1][3] == (3 if not cleaned else '3')
+
+
+def test_csv_keeps_values():
+    data = b''.join(iter_csv(ROWS)).decode('utf-8')
+    assert '<p>a\x0bb\x00c\x1f</p>' in data
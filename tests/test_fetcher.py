@@ -0,0 +1,91 @@
+"""Тести декодування сторінок і circuit breaker у fetcher."""
+import time
+
+import pytest
+
+from fetcher import DomainCircuitBreaker, decode_body
+
+UKRAINIAN = ('<html><head>{meta}<title>Новини</title></head><body><h1>Заголовок статті</h1>'
+             '<p>Привіт, світе! Ґанок, їжак, єнот. Український текст для перевірки кодування.</p>' * 20 +
+             '</body></html>')
+FRENCH = ('<html><head>{meta}</head><body><h1>Élève</h1>'
+          '<p>Le café est déjà prêt, voilà une très belle journée à Paris.</p>' * 20 + '</body></html>')
+
+
+def page(text: str, encoding: str, meta: str = '') -> bytes:
+    return text.format(meta=meta).encode(encoding)
+
+
+def test_header_only():
+    result = decode_body(page(UKRAINIAN, 'cp1251'), 'windows-1251')
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_meta_only():
+    result = decode_body(page(UKRAINIAN, 'cp1251', '<meta charset="windows-1251">'), None)
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+@pytest.mark.parametrize('header', ['iso-8859-1', 'us-ascii', 'windows-1252'])
+def test_wrong_latin_header_with_meta(header):
+    result = decode_body(page(UKRAINIAN, 'cp1251', '<meta charset="windows-1251">'), header)
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_wrong_latin_header_without_meta():
+    result = decode_body(page(UKRAINIAN, 'cp1251'), 'iso-8859-1')
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_wrong_utf8_header():
+    result = decode_body(page(UKRAINIAN, 'cp1251'), 'utf-8')
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_no_header():
+    result = decode_body(page(UKRAINIAN, 'cp1251'), None)
+    assert result.encoding == 'cp1251'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_no_header_utf8():
+    result = decode_body(page(UKRAINIAN, 'utf-8'), None)
+    assert result.encoding == 'utf-8'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_latin_header_for_latin_page():
+    result = decode_body(page(FRENCH, 'cp1252'), 'iso-8859-1')
+    assert 'café est déjà prêt' in result.text
+
+
+def test_bom_wins_over_header():
+    result = decode_body(b'\xef\xbb\xbf' + page(UKRAINIAN, 'utf-8'), 'windows-1251')
+    assert result.encoding == 'utf-8-sig'
+    assert 'Ґанок, їжак' in result.text
+
+
+def test_circuit_breaker_half_open_allows_single_probe():
+    breaker = DomainCircuitBreaker(failures=2, cooldown=0.05)
+    assert breaker.acquire('example.com') == 0
+    breaker.failure('example.com')
+    assert breaker.acquire('example.com') == 0
+    breaker.failure('example.com')
+    assert breaker.acquire('example.com') > 0
+    time.sleep(0.06)
+    assert breaker.acquire('example.com') == 0
+    assert breaker.acquire('example.com') > 0
+    assert breaker.acquire('example.com') > 0
+    assert breaker.acquire('other.com') == 0
+    breaker.failure('example.com')
+    assert breaker.acquire('example.com') > 0
+    time.sleep(0.06)
+    assert breaker.acquire('example.com') == 0
+    breaker.success('example.com')
+    assert breaker.acquire('example.com') == 0
+    assert breaker.acquire('example.com') == 0
@@ -0,0 +1,35 @@
+"""
+Результат analyze_page на tests/test.html має збігатися байт у байт з результатом коду до
+оптимізацій (рушій bs4, усі три режими code_v).
+
+Еталон (tests/golden/test_html.json) містить SHA-256 і довжину кожного поля, отримані
+попередньою реалізацією parser.analysis_html.
+"""
+import hashlib
+import json
+import os
+
+import pytest
+
+import parser
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+with open(os.path.join(TESTS_DIR, 'golden', 'test_html.json'), encoding='utf-8') as file:
+    GOLDEN = json.load(file)
+
+
+@pytest.fixture(scope='module')
+def page_source():
+    with open(os.path.join(TESTS_DIR, 'test.html'), encoding='utf-8') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('code_v', sorted(GOLDEN['results']))
+def test_matches_golden(code_v, page_source, monkeypatch):
+    monkeypatch.setitem(parser.config, 'engine', 'bs4')
+    result = parser.analyze_page(GOLDEN['url'], page_source, code_v, GOLDEN['ignore_words'])
+    for field, expected in GOLDEN['results'][code_v].items():
+        value = str(result[field])
+        assert len(value) == expected['length'], field
+        assert hashlib.sha256(value.encode('utf-8')).hexdigest() == expected['sha256'], field
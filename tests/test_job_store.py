@@ -0,0 +1,37 @@
+"""Тести витіснення задач у JobStore: активні задачі не видаляються за лімітом і TTL."""
+import time
+
+import pytest
+
+from job_store import JobStore
+
+
+def test_active_jobs_survive_lru_limit():
+    store = JobStore(max_jobs=2, ttl=0, db_path='')
+    first, second, third = store.create(), store.create(), store.create()
+    store.append(first, [{'URL': 'https://example.com/1'}])
+    assert store.records(first) == [{'URL': 'https://example.com/1'}]
+    for job_id in (second, third):
+        store.append(job_id, [{'URL': 'https://example.com/2'}])
+
+
+def test_finished_jobs_are_evicted():
+    store = JobStore(max_jobs=2, ttl=0, db_path='')
+    jobs = [store.create() for _ in range(3)]
+    for job_id in jobs:
+        store.finish(job_id)
+    assert store.get(jobs[0]) is None
+    assert store.get(jobs[2]) is not None
+    with pytest.raises(KeyError):
+        store.append(jobs[0], [{'URL': 'https://example.com/1'}])
+
+
+def test_active_jobs_survive_ttl():
+    store = JobStore(max_jobs=10, ttl=0.01, db_path='')
+    active = store.create()
+    finished = store.create()
+    store.finish(finished)
+    time.sleep(0.02)
+    store.create()
+    store.append(active, [{'URL': 'https://example.com/1'}])
+    assert store.get(finished) is None
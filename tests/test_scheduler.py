@@ -0,0 +1,66 @@
+"""Тести BatchScheduler: доменні обмеження і очищення стану доменів."""
+import asyncio
+import time
+
+from scheduler import BatchScheduler
+
+
+def test_domain_state_is_pruned():
+    async def main():
+        scheduler = BatchScheduler(max_concurrency=4, per_domain_concurrency=1, per_domain_delay=0.01)
+
+        async def worker(url):
+            await asyncio.sleep(0)
+            return url
+
+        urls = [f'https://site{i}.com/page' for i in range(50)]
+        assert await scheduler.run(urls, worker) == urls
+        await asyncio.sleep(0.02)
+        await scheduler.run(['https://example.com/'], worker)
+        await asyncio.sleep(0.02)
+        scheduler._prune()
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler._domain_semaphores == {}
+    assert scheduler._domain_next_start == {}
+    assert scheduler._domain_users == {}
+
+
+def test_per_domain_limits_still_apply():
+    async def main():
+        scheduler = BatchScheduler(max_concurrency=10, per_domain_concurrency=2, per_domain_delay=0.02)
+        active, peak, starts = 0, 0, []
+
+        async def worker(url):
+            nonlocal active, peak
+            starts.append(time.monotonic())
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+
+        await scheduler.run([f'https://example.com/{i}' for i in range(6)], worker)
+        return peak, starts
+
+    peak, starts = asyncio.run(main())
+    assert peak <= 2
+    assert all(b - a >= 0.015 for a, b in zip(starts, starts[1:]))
+
+
+def test_cancelled_executor_future_counts_as_failed_url():
+    async def main():
+        scheduler = BatchScheduler(max_concurrency=2, per_domain_concurrency=2, per_domain_delay=0)
+
+        async def worker(url):
+            if url.endswith('/bad'):
+                # Так поводиться run_in_executor, коли виконавець зупинено з cancel_futures=True
+                future = asyncio.get_running_loop().create_future()
+                future.cancel()
+                return await future
+            return url
+
+        urls = ['https://example.com/ok', 'https://example.com/bad']
+        return await asyncio.wait_for(scheduler.run(urls, worker), timeout=5)
+
+    assert asyncio.run(main()) == ['https://example.com/ok', None]
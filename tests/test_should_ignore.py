@@ -0,0 +1,43 @@
+"""Еквівалентність should_ignore з одним скомпільованим виразом попередній реалізації (перебір речень і фраз)."""
+import random
+import re
+
+import pytest
+
+from data_processing import should_ignore
+
+ALPHABET = list('abcAB Їїабв.!?,-') + ['İ', 'ß', 'ẞ', 'Σ', 'ς']
+
+
+def legacy_should_ignore(text, ignore_list):
+    """Попередня реалізація should_ignore."""
+    for sentence in re.split(r'[.!?]', text):
+        for phrase in ignore_list:
+            if phrase.lower() in sentence.lower():
+                return True
+    return False
+
+
+def random_string(rng, max_length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_length)))
+
+
+@pytest.mark.parametrize('text, ignore_list', [
+    ('', []),
+    ('Текст статті', []),
+    ('Текст статті', ['']),
+    ('Автор: Іван', ['автор:']),
+    ('Кінець речення. Похожие статьи', ['речення. похожие']),
+    ('ПОХОЖИЕ СТАТЬИ', ['Похожие статьи']),
+    ('abc', ['abcd', 'bc']),
+])
+def test_known_cases(text, ignore_list):
+    assert should_ignore(text, ignore_list) == legacy_should_ignore(text, ignore_list)
+
+
+def test_random_equivalence():
+    rng = random.Random(9)
+    for _ in range(20000):
+        text = random_string(rng, 40)
+        ignore_list = [random_string(rng, 4) for _ in range(rng.randint(0, 4))]
+        assert should_ignore(text, ignore_list) == legacy_should_ignore(text, ignore_list), (text, ignore_list)
@@ -1,6 +1,6 @@
 """
-Цей модуль містить утиліти для роботи з конфігураційними файлами, HTTP статусами,
-перетворенням HTML в XML та створенням ZIP архівів.
+Цей модуль містить утиліти для роботи з конфігураційними файлами, HTTP статусами
+та перетворенням HTML в XML.
 
 Функції:
 1. `load_config(config_file)`: Завантажує конфігурацію з YAML файлу.
@@ -19,28 +19,24 @@
 
 3. `html_to_xml(html_content)`: Перетворює HTML в XML формат.
    - Параметри:
-     - `html_content` (BeautifulSoup): HTML контент у вигляді BeautifulSoup об'єкта.
+     - `html_content` (BeautifulSoup | str): HTML контент у вигляді BeautifulSoup об'єкта або рядка.
    - Повертає:
      - str: XML представлення HTML контенту.
-
-4. `create_zip_archive(files, zip_file_path)`: Створює ZIP архів з файлів.
-   - Параметри:
-     - `files` (list): Список шляхів до файлів, які потрібно включити в архів.
-     - `zip_file_path` (str): Шлях до створюваного ZIP архіву.
-   - Викидає:
-     - FileNotFoundError: Якщо якийсь з файлів не знайдено.
+   `iter_html_to_xml(html_content)` робить те саме, але віддає XML частинами (ітеративний обхід без рекурсії).
 
 """
+import io
 import logging
+import re
+from typing import Iterator, List
 
 import yaml
-import zipfile
-import xml.etree.ElementTree as ET
+from xml.sax.saxutils import XMLGenerator
 from urllib.parse import urljoin
 import os
 from googlesearch import search
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Comment, Declaration, Doctype, ProcessingInstruction, Tag
 
 logging.basicConfig(level=logging.INFO, filename='parser.log', filemode='a',
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -55,52 +51,6 @@ def load_config(config_file: str):
 
 
 
-def blacklist(blacklist_file: str):
-    """blacklist - список сторінок які потрібно блокувати txt"""
-    if not os.path.isfile(blacklist_file):
-        raise FileNotFoundError(f"Файл blacklist :  {blacklist_file} не знайдено.")
-    with open(blacklist_file, 'r', encoding='utf-8') as file:
-        return file.read().split('\n')
-
-def add_unreachable_site(blacklist_file: str, site_url: str):
-    print(1)
-    print(blacklist_file)
-    """
-    Додає недоступний сайт у файл.
-
-    blacklist_file - назва текстового файлу, в який записуються недоступні сайти.
-    site_url - URL сайту, який потрібно додати до списку недоступних.
-    """
-    # Отримуємо шлях до поточної директорії
-    current_directory = os.getcwd()
-
-    # Створюємо повний шлях до файлу
-    blacklist_file_path = os.path.join(current_directory, blacklist_file)
-    print(blacklist_file_path)
-    # Перевіряємо, чи файл існує і створюємо його, якщо необхідно
-    file_exists = os.path.isfile(blacklist_file_path)
-
-    if not file_exists:
-        with open(blacklist_file_path, 'w', encoding='utf-8') as file:
-            pass  # Просто створюємо порожній файл
-
-    # Читаємо існуючі сайти, якщо файл існує
-    existing_sites = set()
-    if file_exists:
-        with open(blacklist_file_path, 'r', encoding='utf-8') as file:
-            existing_sites = set(file.read().splitlines())
-
-    # Додаємо сайт у файл, якщо його ще немає
-    if site_url not in existing_sites:
-        with open(blacklist_file_path, 'a', encoding='utf-8') as file:
-            file.write(site_url + '\n')
-            logging.info(f"Сайт {site_url} додано до тимчасового списку недоступних.")
-    else:
-        logging.info(f"Сайт {site_url} вже є у тимчасовому списку недоступних.")
-
-
-
-
 def get_status_description(status_code: int)->str:
     """Повертає опис статус-коду HTTP."""
     from http import HTTPStatus
@@ -111,51 +61,83 @@ def get_status_description(status_code: int)->str:
         return f"Невідомий код відповіді: {status_code}"
 
 
+# Символи, недопустимі в іменах тегів/атрибутів XML, та символи, недопустимі в тексті XML 1.0
+_XML_NAME_INVALID = re.compile(r'[^\w.\-]')
+_XML_TEXT_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+# Вузли BeautifulSoup, які не переносяться в XML
+_XML_SKIPPED_NODES = (Comment, Declaration, Doctype, ProcessingInstruction)
+
+
+def _xml_name(name: str) -> str:
+    """Робить з імені тегу або атрибута HTML допустиме ім'я XML."""
+    name = _XML_NAME_INVALID.sub('_', name)
+    if not name or not (name[0].isalpha() or name[0] == '_'):
+        name = '_' + name
+    return name
+
+
+def iter_html_to_xml(html_content, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Перетворює HTML-контент у XML і віддає результат частинами.
+
+    Дерево обходиться ітеративно (без рекурсії), тому глибина документа не обмежена.
+    Зберігається весь текст, зокрема текст між дочірніми тегами.
+
+    :param html_content: Об'єкт BeautifulSoup або рядок, що містить HTML-контент.
+    :param chunk_size: Приблизний розмір частини у символах.
+    """
+    if isinstance(html_content, str):
+        html_content = BeautifulSoup(html_content, 'html.parser')
+    buffer = io.StringIO()
+    generator = XMLGenerator(buffer, short_empty_elements=True)
+    generator.startElement('root', {})
+
+    # Вузол [document] не переноситься - його діти стають дітьми <root>
+    nodes = [iter(html_content.contents if isinstance(html_content, BeautifulSoup) else [html_content])]
+    names: List[str] = []
+    while nodes:
+        node = next(nodes[-1], None)
+        if node is None:
+            nodes.pop()
+            if names:
+                generator.endElement(names.pop())
+            continue
+        if isinstance(node, Tag):
+            name = _xml_name(node.name)
+            attrs = {_xml_name(attr): _XML_TEXT_INVALID.sub('', ' '.join(value) if isinstance(value, list) else str(value))
+                     for attr, value in node.attrs.items()}
+            generator.startElement(name, attrs)
+            names.append(name)
+            nodes.append(iter(node.contents))
+        elif not isinstance(node, _XML_SKIPPED_NODES):
+            generator.characters(_XML_TEXT_INVALID.sub('', str(node)))
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    generator.endElement('root')
+    yield buffer.getvalue()
+
+
 def html_to_xml(html_content: BeautifulSoup):
     """
     Перетворює HTML-контент у формат XML.
     Якщо виникає помилка або результат порожній, зберігає HTML-контент як XML.
 
-    :param html_content: Об'єкт BeautifulSoup, що містить HTML-контент.
+    :param html_content: Об'єкт BeautifulSoup або рядок, що містить HTML-контент.
     :return: XML-контент у вигляді рядка.
     """
-    import xml.etree.ElementTree as ET
-
     try:
-        root = ET.Element("root")
-
-        def parse_element(element, parent):
-            tag = ET.SubElement(parent, element.name)
-            for attr, value in element.attrs.items():
-                tag.set(attr, value)
-            if element.string:
-                tag.text = element.string.strip()
-            for child in element.children:
-                if isinstance(child, str):
-                    continue
-                parse_element(child, tag)
-
-        parse_element(html_content, root)
-        xml_result = ET.tostring(root, encoding='unicode')
-
+        xml_result = ''.join(iter_html_to_xml(html_content))
         if not xml_result.strip():
             raise ValueError("Результат перетворення пустий.")
-
     except Exception as e:
         # Якщо виникає помилка, зберігаємо HTML-контент як XML
-        xml_result = f"<root><![CDATA[{html_content}]]></root>"
+        logging.error(f'Помилка перетворення HTML в XML: {str(e)}')
+        xml_result = f"<root><![CDATA[{str(html_content).replace(']]>', ']]]]><![CDATA[>')}]]></root>"
     return xml_result
 
-def create_zip_archive(files: list, zip_file_path: str):
-    """Створює ZIP архів з файлів."""
-    print('Створює ZIP архів з файлів')
-    with zipfile.ZipFile(zip_file_path, 'w') as zipf:
-        for file in files:
-            if os.path.isfile(file):
-                zipf.write(file, os.path.basename(file))
-            else:
-                raise FileNotFoundError(f"Файл {file} не знайдено.")
-
 def get_google_search_results(query: str, num_results: int = 100):
     """
     Отримує перші `num_results` посилань з Google за запитом `query`.